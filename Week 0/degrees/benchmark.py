@@ -0,0 +1,155 @@
+"""
+Benchmark the degrees search modes on synthetic co-star graphs.
+
+    python benchmark.py [--people N] [--movies N] [--cast N]
+                        [--distribution uniform|powerlaw] [--queries N]
+                        [--modes bfs,bidirectional,astar]
+                        [--layouts dict,compact]
+
+Writes a synthetic people/movies/stars dataset to a temporary directory,
+loads it through degrees.load_data in each layout, runs the same random
+queries through every mode and prints per-query costs from SearchStats.
+"""
+
+import argparse
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import degrees
+from stats import SearchStats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--people", type=int, default=20000)
+    parser.add_argument("--movies", type=int, default=8000)
+    parser.add_argument("--cast", type=int, default=4,
+                        help="stars per movie")
+    parser.add_argument("--distribution", choices=["uniform", "powerlaw"],
+                        default="powerlaw",
+                        help="how likely each person is to be cast")
+    parser.add_argument("--exponent", type=float, default=0.8,
+                        help="power law exponent of casting popularity")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--modes", default="bfs,bidirectional,astar")
+    parser.add_argument("--layouts", default="dict,compact")
+    parser.add_argument("--landmarks", type=int, default=8,
+                        help="landmarks indexed for astar")
+    parser.add_argument("--memory", action="store_true",
+                        help="also trace per-query peak memory (slow)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        generate(directory, args.people, args.movies, args.cast,
+                 args.distribution, args.exponent, rng)
+        person_ids = [str(i) for i in range(args.people)]
+        queries = [(rng.choice(person_ids), rng.choice(person_ids))
+                   for _ in range(args.queries)]
+
+        print(f"{'layout':8} {'mode':14} {'load s':>7} {'mean ms':>8} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'expanded':>9} {'frontier':>9} "
+              f"{'nbr %':>6} {'mem KiB':>8}")
+        for layout in args.layouts.split(","):
+            started = time.perf_counter()
+            reset()
+            degrees.load_data(directory, compact=(layout == "compact"))
+            loaded = time.perf_counter() - started
+
+            for mode in args.modes.split(","):
+                if mode == "astar":
+                    if layout != "compact":
+                        continue
+                    degrees.build_landmarks(args.landmarks)
+                results = run(queries, mode, args.memory)
+                report(layout, mode, loaded, results)
+
+
+def generate(directory, people, movies, cast, distribution, exponent, rng):
+    """
+    Writes people.csv, movies.csv and stars.csv for a random co-star
+    graph. With a power law distribution person i is cast with weight
+    1 / (i + 1) ** exponent, giving a few heavily connected stars and a
+    long tail, as in the real data.
+    """
+    with open(os.path.join(directory, "people.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(people):
+            writer.writerow([i, f"Person {i}", 1900 + rng.randrange(100)])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(movies):
+            writer.writerow([f"m{i}", f"Movie {i}", 1920 + rng.randrange(100)])
+
+    weights = None
+    if distribution == "powerlaw":
+        weights = [1 / (i + 1) ** exponent for i in range(people)]
+        total = 0
+        for i, weight in enumerate(weights):
+            total += weight
+            weights[i] = total
+
+    with open(os.path.join(directory, "stars.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        population = range(people)
+        for i in range(movies):
+            if weights is None:
+                stars = rng.sample(population, cast)
+            else:
+                stars = set(rng.choices(population, cum_weights=weights,
+                                        k=cast))
+            for person in stars:
+                writer.writerow([person, f"m{i}"])
+
+
+def reset():
+    """Forgets whatever degrees has loaded."""
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.graph = None
+
+
+def run(queries, mode, trace_memory):
+    """Runs every query in mode, returning their SearchStats."""
+    results = []
+    for source, target in queries:
+        stats = SearchStats(trace_memory)
+        degrees.shortest_path(source, target, mode, stats)
+        results.append(stats)
+    return results
+
+
+def report(layout, mode, loaded, results):
+    """Prints one summary row for a layout and mode."""
+    times = [stats.wall_time * 1000 for stats in results]
+    if len(times) > 1:
+        p50 = statistics.median(times)
+        p95 = statistics.quantiles(times, n=20)[-1]
+    else:
+        p50 = p95 = times[0]
+    wall = sum(stats.wall_time for stats in results)
+    neighbor = sum(stats.neighbor_time for stats in results)
+    memory = "-"
+    if results[0].memory_peak is not None:
+        memory = f"{statistics.mean(s.memory_peak for s in results) / 1024:.0f}"
+    print(f"{layout:8} {mode:14} {loaded:7.2f} {statistics.mean(times):8.2f} "
+          f"{p50:8.2f} {p95:8.2f} "
+          f"{statistics.mean(s.nodes_expanded for s in results):9.0f} "
+          f"{statistics.mean(s.frontier_peak for s in results):9.0f} "
+          f"{100 * neighbor / wall if wall else 0:6.1f} {memory:>8}")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
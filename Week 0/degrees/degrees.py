@@ -1,6 +1,25 @@
+import argparse
 import csv
+import gc
+import io
+import json
+import math
+import multiprocessing
 import sys
+import threading
+from array import array
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
+import snapshot
+from graph import CompactGraph
+from landmarks import LandmarkIndex, astar_search, choose_hubs
+from landmarks import single_source_distances
+from loader import MemoryBudgetExceeded, StreamingLoader
+from paths import enumerate_paths, filtered
+from stats import SearchStats
+from nameindex import NameIndex
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,10 +31,100 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
-def load_data(directory):
+# Interned co-star adjacency, built by load_data(directory, compact=True).
+# When present, people and movies drop their "movies"/"stars" sets and
+# the searches run over this graph instead.
+graph = None
+
+# Landmark distance index over graph, built by build_landmarks
+landmark_index = None
+
+# Prefix/fuzzy search over people's names, built by name_search on
+# first use, or why it could not be built within the memory budget
+name_index = None
+name_index_error = None
+name_index_lock = threading.Lock()
+
+# StreamingLoader of the last load_streaming, whose memory budget the
+# name index is charged to as well
+streaming_loader = None
+
+# How resolve_name picks among people sharing a name: key functions
+# ranking candidate person_ids, best first
+AMBIGUITY_POLICIES = {
+    "most-credits": lambda person_id: -credit_count(person_id),
+    "earliest-birth": lambda person_id: birth_year(person_id, 10 ** 4),
+    "latest-birth": lambda person_id: -birth_year(person_id, -(10 ** 4)),
+}
+
+# Loader function and arguments of the last load, so worker processes
+# that cannot inherit the loaded data can load it again themselves
+load_arguments = None
+
+def load_data(directory, compact=False, use_snapshot=False):
     """
     Load data from CSV files into memory.
+
+    With compact=True the credits are interned into a CompactGraph
+    rather than stored as sets on every person and movie.
+
+    With use_snapshot=True (which implies compact) the data is read from
+    a binary snapshot beside the CSVs when one matches them, and such a
+    snapshot is written after parsing the CSVs otherwise. People and
+    movies read from a snapshot are Records views over typed columns,
+    as with load_streaming.
+    """
+    global landmark_index, name_index, name_index_error, load_arguments
+    global streaming_loader
+    load_arguments = (load_data, (directory, compact, use_snapshot))
+    landmark_index = None
+    name_index = name_index_error = streaming_loader = None
+
+    read_data(directory, compact, use_snapshot)
+
+
+def load_streaming(directory, memory_budget=None, seeds=None, hops=None):
+    """
+    Load data with a StreamingLoader instead of load_data: the CSVs are
+    parsed in chunks straight into a CompactGraph and typed columns,
+    holding at most memory_budget bytes (if given).
+
+    seeds (names) and hops restrict loading to the people within hops
+    co-star links of the seeds. Replaces the people, movies and names
+    tables with read-only views and returns the loader's LoadReport.
     """
+    global graph, people, movies, names
+    global landmark_index, name_index, name_index_error, load_arguments
+    global streaming_loader
+    load_arguments = (load_streaming, (directory, memory_budget, seeds, hops))
+    landmark_index = None
+    name_index = name_index_error = None
+
+    streaming_loader = StreamingLoader(directory, memory_budget)
+    seed_ids = (None if seeds is None
+                else streaming_loader.find_people(seeds))
+    graph, people, movies, names = streaming_loader.load(seed_ids, hops)
+    return streaming_loader.report
+
+
+def read_data(directory, compact, use_snapshot):
+    """
+    Reads people, movies and credits for load_data, from the snapshot
+    or the CSV files.
+    """
+    global graph, people, movies
+
+    if use_snapshot:
+        key = snapshot.snapshot_key(directory)
+        path = snapshot.snapshot_path(directory)
+        loaded = snapshot.read_snapshot(path, key)
+        if loaded is not None:
+            graph, people, movies = loaded
+            for person_id, person in people.items():
+                names.setdefault(person["name"].lower(), set()).add(person_id)
+            return
+        compact = True
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -23,8 +132,9 @@ def load_data(directory):
             people[row["id"]] = {
                 "name": row["name"],
                 "birth": row["birth"],
-                "movies": set()
             }
+            if not compact:
+                people[row["id"]]["movies"] = set()
             if row["name"].lower() not in names:
                 names[row["name"].lower()] = {row["id"]}
             else:
@@ -37,8 +147,20 @@ def load_data(directory):
             movies[row["id"]] = {
                 "title": row["title"],
                 "year": row["year"],
-                "stars": set()
             }
+            if not compact:
+                movies[row["id"]]["stars"] = set()
+
+    if compact:
+        load_compact_stars(directory)
+        if use_snapshot:
+            try:
+                snapshot.write_snapshot(path, key, graph, people, movies)
+            except OSError:
+                # A read-only data directory just means no cache
+                pass
+        return
+    graph = None
 
     # Load stars
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
@@ -51,15 +173,139 @@ def load_data(directory):
                 pass
 
 
+def load_compact_stars(directory):
+    """
+    Reads stars.csv into interned credit arrays and builds the
+    CompactGraph from them.
+    """
+    global graph
+
+    person_ids = list(people)
+    movie_ids = list(movies)
+    person_index = {pid: i for i, pid in enumerate(person_ids)}
+    movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+
+    credit_people = array("i")
+    credit_movies = array("i")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
+            except KeyError:
+                continue
+            credit_people.append(person)
+            credit_movies.append(movie)
+
+    graph = CompactGraph.from_credits(
+        person_ids, movie_ids, credit_people, credit_movies
+    )
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(usage="python degrees.py [directory]")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="load credits into an interned CSR graph")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="load from (and maintain) a binary snapshot "
+                             "of the data directory; implies --compact")
+    parser.add_argument("--stream", action="store_true",
+                        help="parse the CSVs in chunks into typed arrays "
+                             "instead of per-row dictionaries")
+    parser.add_argument("--memory-budget", metavar="MB", type=float,
+                        help="with --stream, fail rather than hold more "
+                             "than MB megabytes of data (and of the name "
+                             "index, if searched)")
+    parser.add_argument("--seeds", metavar="NAME", nargs="+",
+                        help="with --stream, load only people near these")
+    parser.add_argument("--hops", type=int,
+                        help="with --seeds, how many co-star links to "
+                             "keep around them (default: all reachable)")
+    parser.add_argument("--mode", choices=SEARCH_MODES,
+                        default="bidirectional", help="search engine")
+    parser.add_argument("--paths", metavar="K", type=int, default=1,
+                        help="show the K shortest paths instead of one")
+    parser.add_argument("--landmarks", metavar="N", type=int,
+                        help="index distances from the N best-connected "
+                             "people (for --mode astar, default 16 there); "
+                             "implies --compact")
+    parser.add_argument("--distances-from", metavar="NAME",
+                        help="print every person's distance from NAME "
+                             "as CSV and exit")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer 'source,target' name pairs from FILE "
+                             "('-' for stdin) as JSON lines")
+    parser.add_argument("--ambiguous", default="error",
+                        choices=["error"] + list(AMBIGUITY_POLICIES),
+                        help="how --batch/--serve settle people sharing "
+                             "a name")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes solving --batch queries")
+    parser.add_argument("--serve", metavar="PORT", type=int,
+                        help="answer queries over HTTP on PORT")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="interface to bind with --serve")
+    args = parser.parse_args()
+    if args.landmarks is None:
+        args.landmarks = 16 if args.mode == "astar" else 0
+    elif args.mode == "astar" and args.landmarks < 1:
+        parser.error("--mode astar needs at least one landmark")
+
+    # Keep stdout clean for machine-readable output
+    if args.batch or args.serve or args.distances_from is not None:
+        log = sys.stderr
+    else:
+        log = sys.stdout
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=log)
+    if args.stream:
+        budget = None
+        if args.memory_budget is not None:
+            budget = int(args.memory_budget * 2 ** 20)
+        try:
+            report = load_streaming(args.directory, budget, args.seeds,
+                                    args.hops)
+        except MemoryBudgetExceeded as e:
+            sys.exit(str(e))
+        print(json.dumps(report.as_dict()), file=log)
+    else:
+        load_data(args.directory,
+                  compact=args.compact or args.landmarks > 0
+                  or args.distances_from is not None,
+                  use_snapshot=args.snapshot)
+    print("Data loaded.", file=log)
+
+    if args.landmarks:
+        print("Indexing landmarks...", file=log)
+        build_landmarks(args.landmarks)
+
+    if args.distances_from is not None:
+        source = person_id_for_name(args.distances_from)
+        if source is None:
+            sys.exit("Person not found.")
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["person_id", "distance"])
+        for i, distance in enumerate(distances_from(source)):
+            if distance >= 0:
+                writer.writerow([graph.person_ids[i], distance])
+        return
+
+    if args.batch:
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout, args.mode, args.workers,
+                      args.ambiguous)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, sys.stdout, args.mode, args.workers,
+                          args.ambiguous)
+        return
+
+    if args.serve:
+        serve(args.host, args.serve, args.mode, args.ambiguous)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -68,35 +314,93 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.paths > 1:
+        found = False
+        for path in k_shortest_paths(source, target, args.paths):
+            found = True
+            print_path(source, path)
+        if not found:
+            print("Not connected.")
+        return
+
+    path = shortest_path(source, target, args.mode)
 
     if path is None:
         print("Not connected.")
     else:
-        degrees = len(path)
-        print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print_path(source, path)
 
 
-def shortest_path(source, target):
+def print_path(source, path):
+    """Prints a (movie_id, person_id) path from source, one step a line."""
+    degrees = len(path)
+    print(f"{degrees} degrees of separation.")
+    path = [(None, source)] + path
+    for i in range(degrees):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+def shortest_path(source, target, mode="bidirectional", stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `mode` selects the search engine, one of the keys of SEARCH_MODES.
+    If `stats` (a SearchStats) is given, the search's cost is recorded
+    in it.
+
     If no possible path, returns None.
     """
+    try:
+        search = SEARCH_MODES[mode]
+    except KeyError:
+        raise ValueError(f"unknown search mode {mode!r}")
+
+    if graph is None:
+        neighbors = neighbors_for_person
+    else:
+        source = graph.person_index[source]
+        target = graph.person_index[target]
+        neighbors = graph.neighbors
+
+    if stats is not None:
+        stats.start()
+        neighbors = stats.timed(neighbors)
+    path = search(source, target, neighbors, stats)
+    if graph is not None and path is not None:
+        path = graph.to_ids(path)
+    if stats is not None:
+        stats.finish(path)
+    return path
+
+
+def measured_path(source, target, mode="bidirectional", trace_memory=False):
+    """
+    Returns (path, SearchStats) for one shortest_path query.
+    """
+    stats = SearchStats(trace_memory)
+    path = shortest_path(source, target, mode, stats)
+    return path, stats
+
+
+def breadth_first_search(source, target, neighbors=None, stats=None):
+    """
+    Single-source breadth-first search from source towards target.
+
+    `neighbors` maps a state to its (action, state) pairs and defaults
+    to neighbors_for_person. `stats`, if given, is a SearchStats
+    recording each expansion.
+    """
+    if neighbors is None:
+        neighbors = neighbors_for_person
+
     #get source id & target id 
     source_id = source
     target_id = target
 
-    #keep a track of number of steps
-    steps = 0
-
     #initialise the frontier to starting position, state -> person_id and action -> movie_id    
     start = Node(source_id, None, None)
     frontier = QueueFrontier()
@@ -109,12 +413,12 @@ def shortest_path(source, target):
     while True:
         #if frontier is empty, return None
         if frontier.empty() == True:
-            raise Exception("no solution") 
+            return None
 
         #pick a node from the frontier
         node = frontier.remove()
-        steps += 1
-        #print(node.state, node.action)
+        if stats is not None:
+            stats.expand(len(frontier.frontier) + 1)
 
         #if node is end goal, return the answer
         if node.state == target_id:
@@ -128,18 +432,17 @@ def shortest_path(source, target):
 
             #reverse actions & states
             solution.reverse()
-            print(solution)
 
             #compile them in to an answer
             return solution
 
-        #add node in explored
-        explored.add(node)
+        #add node's state (person_id) in explored
+        explored.add(node.state)
 
         #get neighbouring nodes and actions for the picked up node
-        neighbours = neighbors_for_person(node.state)
+        neighbours = neighbors(node.state)
         for neighbour in neighbours:
-            if neighbour not in explored and not frontier.contains_state(neighbour):
+            if neighbour[1] not in explored and not frontier.contains_state(neighbour[1]):
                 child = Node(neighbour[1], node, neighbour[0])
                 if child.state == target:
                     solution = []
@@ -151,6 +454,212 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
+def bidirectional_search(source, target, neighbors=None, stats=None):
+    """
+    Breadth-first search grown from both source and target at once.
+
+    Each round expands one full level of the smaller frontier, so the
+    two searches meet in the middle after visiting roughly the square
+    root of the nodes a single-source search would need.
+    """
+    if neighbors is None:
+        neighbors = neighbors_for_person
+    if source == target:
+        return []
+
+    # Maps person_id -> (movie_id, person_id one step closer to the root)
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # Always grow the cheaper side
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, others = forward_frontier, forward, backward
+        else:
+            frontier, parents, others = backward_frontier, backward, forward
+
+        next_frontier = []
+        for person_id in frontier:
+            if stats is not None:
+                stats.expand(len(forward_frontier) + len(backward_frontier)
+                             + len(next_frontier))
+            for movie_id, neighbour in neighbors(person_id):
+                if neighbour in parents:
+                    continue
+                parents[neighbour] = (movie_id, person_id)
+                if neighbour in others:
+                    return join_paths(forward, backward, neighbour)
+                next_frontier.append(neighbour)
+
+        if parents is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Builds the (movie_id, person_id) path through `meeting` from the
+    parent maps of a bidirectional search.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, child = backward[person_id]
+        path.append((movie_id, child))
+        person_id = child
+    return path
+
+
+def landmark_search(source, target, neighbors=None, stats=None):
+    """
+    A* search guided by the landmark index.
+    Needs a compact graph and build_landmarks to have been called.
+    """
+    if graph is None or landmark_index is None:
+        raise ValueError("astar mode needs load_data(..., compact=True) "
+                         "and build_landmarks()")
+    if neighbors is None:
+        neighbors = graph.neighbors
+    return astar_search(source, target, neighbors,
+                        landmark_index.heuristic(target), stats)
+
+
+SEARCH_MODES = {
+    "bfs": breadth_first_search,
+    "bidirectional": bidirectional_search,
+    "astar": landmark_search,
+}
+
+
+def all_shortest_paths(source, target, min_year=None, max_year=None,
+                       exclude=()):
+    """
+    Lazily yields every shortest list of (movie_id, person_id) pairs
+    connecting source to target. See path_neighbors for the filters.
+    """
+    return generate_paths(source, target, min_year, max_year, exclude,
+                          shortest_only=True)
+
+
+def k_shortest_paths(source, target, k=None, min_year=None, max_year=None,
+                     exclude=(), max_length=None):
+    """
+    Lazily yields up to k (all, if k is None) simple lists of
+    (movie_id, person_id) pairs connecting source to target, shortest
+    first, none longer than max_length steps if given.
+    See path_neighbors for the filters.
+    """
+    paths = generate_paths(source, target, min_year, max_year, exclude,
+                           max_length=max_length)
+    for found, path in enumerate(paths):
+        if k is not None and found >= k:
+            return
+        yield path
+
+
+def generate_paths(source, target, min_year, max_year, exclude, **options):
+    """
+    Runs enumerate_paths over the loaded data, translating between
+    person_ids and interned ids when a compact graph is loaded.
+    """
+    neighbors = path_neighbors(min_year, max_year, exclude)
+    if graph is None:
+        yield from enumerate_paths(source, target, neighbors, **options)
+        return
+    paths = enumerate_paths(graph.person_index[source],
+                            graph.person_index[target], neighbors, **options)
+    for path in paths:
+        yield graph.to_ids(path)
+
+
+def path_neighbors(min_year=None, max_year=None, exclude=()):
+    """
+    Returns the neighbors function for the loaded data, restricted to
+    movies released between min_year and max_year (inclusive, either
+    may be None) and avoiding the person_ids in exclude.
+    """
+    if graph is None:
+        neighbors = neighbors_for_person
+        movie_id_of = str
+        person_key = str
+    else:
+        neighbors = graph.neighbors
+        movie_id_of = graph.movie_ids.__getitem__
+        person_key = graph.person_index.__getitem__
+
+    allow = None
+    if min_year is not None or max_year is not None:
+        low = min_year if min_year is not None else -math.inf
+        high = max_year if max_year is not None else math.inf
+
+        def allow(movie):
+            year = movies[movie_id_of(movie)]["year"]
+            return bool(year) and low <= int(year) <= high
+
+    if allow is None and not exclude:
+        return neighbors
+    return filtered(neighbors, allow, [person_key(p) for p in exclude])
+
+
+def build_landmarks(count=16, hubs=None):
+    """
+    Builds the landmark index used by the "astar" search mode and by
+    degrees_of_separation. Landmarks are the given hub person_ids, or
+    else the count best-connected people.
+    """
+    global landmark_index
+    if graph is None:
+        raise ValueError("landmarks need load_data(..., compact=True)")
+    if hubs is None:
+        landmarks = choose_hubs(graph, count)
+    else:
+        landmarks = [graph.person_index[person_id] for person_id in hubs]
+    landmark_index = LandmarkIndex(graph, landmarks)
+
+
+def distances_from(person_id):
+    """
+    Returns the hop count from person_id to everybody, as an array
+    indexed like graph.person_ids (-1 where unreachable).
+    """
+    if graph is None:
+        raise ValueError("distances need load_data(..., compact=True)")
+    source = graph.person_index[person_id]
+    if landmark_index is not None and source in landmark_index.position:
+        return landmark_index.distances[landmark_index.position[source]]
+    return single_source_distances(graph, source)
+
+
+def degrees_of_separation(source, target, mode="bidirectional"):
+    """
+    Returns the number of hops between two people, or None if they are
+    not connected. Answered from the landmark index without searching
+    whenever the index determines it.
+    """
+    if landmark_index is not None:
+        try:
+            return landmark_index.exact_distance(
+                graph.person_index[source], graph.person_index[target]
+            )
+        except LookupError:
+            mode = "astar"
+    path = shortest_path(source, target, mode)
+    return None if path is None else len(path)
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -177,11 +686,129 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def add_person(person_id, name, birth=""):
+    """
+    Adds a person to the loaded data, without reloading it.
+    """
+    if person_id in people:
+        raise ValueError(f"person {person_id} already exists")
+    if graph is None:
+        people[person_id] = {"name": name, "birth": birth, "movies": set()}
+    else:
+        graph.add_person(person_id)
+        people[person_id] = {"name": name, "birth": birth}
+        if landmark_index is not None:
+            landmark_index.grow()
+    names.setdefault(name.lower(), set()).add(person_id)
+    if name_index is not None:
+        name_index.add(person_id)
+
+
+def add_movie(movie_id, title, year=""):
+    """
+    Adds a movie, with no stars yet, to the loaded data. The id of a
+    removed movie may be used again.
+    """
+    if movie_id in movies:
+        raise ValueError(f"movie {movie_id} already exists")
+    if graph is None:
+        movies[movie_id] = {"title": title, "year": year, "stars": set()}
+        return
+
+    # The graph rejects the id before interning it if it cannot take
+    # it, and movies then accepts the record for any id the graph took
+    graph.add_movie(movie_id)
+    movies[movie_id] = {"title": title, "year": year}
+
+
+def add_credit(person_id, movie_id):
+    """
+    Records that a person starred in a movie. The co-star adjacency and
+    the landmark index (if built) are updated in place.
+    """
+    if graph is None:
+        people[person_id]["movies"].add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
+        return
+
+    person = graph.person_index[person_id]
+    movie = graph.movie_index[movie_id]
+    costars = [costar for costar in graph.stars_of(movie) if costar != person]
+    if graph.add_credit(person, movie) and landmark_index is not None:
+        landmark_index.edges_added([(person, costar) for costar in costars])
+
+
+def remove_credit(person_id, movie_id):
+    """
+    Forgets that a person starred in a movie, updating the co-star
+    adjacency and the landmark index (if built) in place.
+    """
+    lost = drop_credit(person_id, movie_id)
+    if lost and landmark_index is not None:
+        landmark_index.edges_removed(lost)
+
+
+def remove_movie(movie_id):
+    """
+    Removes a movie and all its credits from the loaded data.
+    """
+    if graph is None:
+        stars = list(movies[movie_id]["stars"])
+    else:
+        stars = [graph.person_ids[person]
+                 for person in graph.stars_of(graph.movie_index[movie_id])]
+
+    lost = []
+    for person_id in stars:
+        lost.extend(drop_credit(person_id, movie_id))
+    if lost and landmark_index is not None:
+        landmark_index.edges_removed(lost)
+    del movies[movie_id]
+
+
+def drop_credit(person_id, movie_id):
+    """
+    Removes one credit. Returns the interned (person, person) pairs that
+    stopped being co-stars because of it (always empty without a
+    compact graph).
+    """
+    if graph is None:
+        people[person_id]["movies"].discard(movie_id)
+        movies[movie_id]["stars"].discard(person_id)
+        return []
+
+    person = graph.person_index[person_id]
+    movie = graph.movie_index[movie_id]
+    costars = [costar for costar in graph.stars_of(movie) if costar != person]
+    if not graph.remove_credit(person, movie):
+        return []
+    remaining = {costar for _, costar in graph.neighbors(person)}
+    return [(person, costar) for costar in costars if costar not in remaining]
+
+
+def credit_count(person_id):
+    """Returns how many movies a person starred in."""
+    if graph is not None:
+        return len(graph.movies_of(graph.person_index[person_id]))
+    return len(people[person_id]["movies"])
+
+
+def birth_year(person_id, missing):
+    """Returns a person's birth year as an int, or missing if unknown."""
+    try:
+        return int(people[person_id]["birth"])
+    except ValueError:
+        return missing
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return set(graph.to_ids(graph.neighbors(graph.person_index[person_id])))
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -190,5 +817,266 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+class UnresolvedName(LookupError):
+    """
+    A name that resolve_name could not turn into a single person_id.
+    candidates lists the people it might have meant.
+    """
+    def __init__(self, message, candidates):
+        super().__init__(message)
+        self.candidates = candidates
+
+
+def name_search():
+    """
+    Returns the NameIndex over people, building it on first use: only
+    unknown or ambiguous names and /names need it, so loading and plain
+    path queries never pay for it.
+
+    After load_streaming the index is charged to its memory budget;
+    raises MemoryBudgetExceeded (now and on later calls) if it does not
+    fit in what is left.
+    """
+    global name_index, name_index_error
+    with name_index_lock:
+        if name_index is None and name_index_error is None:
+            if streaming_loader is None:
+                name_index = NameIndex(people, credit_count)
+            else:
+                held = streaming_loader.report.bytes
+                try:
+                    name_index = NameIndex(people, credit_count,
+                                           streaming_loader.charge)
+                except MemoryBudgetExceeded as e:
+                    # The part built is dropped
+                    streaming_loader.report.bytes = held
+                    name_index_error = str(e)
+        if name_index_error is not None:
+            raise MemoryBudgetExceeded(name_index_error)
+    return name_index
+
+
+def resolve_name(name, policy="error"):
+    """
+    Non-interactive counterpart of person_id_for_name.
+
+    Several people sharing the name are settled by policy, one of
+    AMBIGUITY_POLICIES, or rejected if policy is "error". Raises
+    UnresolvedName, carrying the candidates, if the name is unknown or
+    ambiguous.
+    """
+    person_ids = names.get(name.lower(), set())
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    if len(person_ids) > 1 and policy in AMBIGUITY_POLICIES:
+        return min(sorted(person_ids), key=AMBIGUITY_POLICIES[policy])
+
+    # Candidates are a courtesy the memory budget may not allow
+    try:
+        index = name_search()
+    except MemoryBudgetExceeded:
+        index = None
+    if len(person_ids) > 1:
+        raise UnresolvedName(f"ambiguous name: {name}",
+                             index.exact(name) if index else [])
+    raise UnresolvedName(f"person not found: {name}",
+                         index.search(name, limit=5) if index else [])
+
+
+def answer_query(source_name, target_name, mode="bidirectional",
+                 policy="error"):
+    """
+    Answers one separation query by name, settling ambiguous names
+    by policy (see resolve_name).
+
+    Returns a JSON-serialisable dictionary with the query, the number of
+    degrees (None if not connected) and the path as a list of steps,
+    or with an "error" message and "candidates" if a name could not be
+    resolved.
+    """
+    answer = {"source": source_name, "target": target_name}
+    try:
+        source = resolve_name(source_name, policy)
+        target = resolve_name(target_name, policy)
+    except UnresolvedName as e:
+        answer["error"] = str(e)
+        answer["candidates"] = e.candidates
+        return answer
+
+    path = shortest_path(source, target, mode)
+    if path is None:
+        answer["degrees"] = None
+        answer["path"] = []
+        return answer
+
+    answer["degrees"] = len(path)
+    answer["path"] = [
+        {
+            "movie_id": movie_id,
+            "movie": movies[movie_id]["title"],
+            "person_id": person_id,
+            "person": people[person_id]["name"],
+        }
+        for movie_id, person_id in path
+    ]
+    return answer
+
+
+def run_batch(lines, out, mode="bidirectional", workers=1, policy="error"):
+    """
+    Reads "source,target" name pairs (CSV quoting allowed) from lines
+    and writes one JSON answer per pair to out as soon as it is known,
+    in input order. With workers > 1 the pairs are solved by a pool of
+    processes. Ambiguous names are settled by policy.
+    """
+    rows = (row for row in csv.reader(lines) if row and "".join(row).strip())
+    if workers > 1:
+        answers = solve_parallel(rows, mode, workers, policy)
+    else:
+        answers = (answer_row(row, mode, policy) for row in rows)
+
+    for answer in answers:
+        out.write(json.dumps(answer) + "\n")
+        out.flush()
+
+
+def load_worker(load, arguments, landmarks):
+    """
+    Readies a worker process that could not inherit the loaded data:
+    loads it again, then builds the landmarks (choosing the same hubs).
+    """
+    load(*arguments)
+    if landmarks:
+        build_landmarks(landmarks)
+
+
+def answer_row(row, mode="bidirectional", policy="error"):
+    """Answers one parsed batch row."""
+    if len(row) != 2:
+        return {"input": row, "error": "expected 'source,target'"}
+    return answer_query(row[0].strip(), row[1].strip(), mode, policy)
+
+
+def solve_parallel(rows, mode, workers, policy="error", chunksize=16,
+                   start_method=None):
+    """
+    Answers rows on a process pool, yielding answers in input order.
+
+    Where processes can be forked (and start_method does not say
+    otherwise), workers inherit the loaded data (including a
+    memory-mapped snapshot) copy-on-write, and nothing but the names and
+    answers crosses process boundaries. The loaded objects are moved out
+    of the garbage collector's reach first so its passes in the workers
+    do not dirty, and so copy, the shared pages. Elsewhere each worker
+    loads the data once itself, and builds as many landmarks.
+    """
+    if (start_method is None
+            and "fork" in multiprocessing.get_all_start_methods()):
+        start_method = "fork"
+    context = multiprocessing.get_context(start_method)
+    if start_method == "fork":
+        initializer, initargs = None, ()
+    else:
+        landmarks = (0 if landmark_index is None
+                     else len(landmark_index.landmarks))
+        initializer, initargs = load_worker, (*load_arguments, landmarks)
+
+    gc.freeze()
+    try:
+        with context.Pool(workers, initializer, initargs) as pool:
+            yield from pool.imap(partial(answer_row, mode=mode, policy=policy),
+                                 rows, chunksize)
+    finally:
+        gc.unfreeze()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    HTTP front end over the loaded data:
+
+        GET  /path?source=NAME&target=NAME   one JSON answer
+        GET  /names?q=TEXT[&limit=N]         ranked name candidates
+        POST /batch                          CSV pairs in, JSON lines out
+    """
+    mode = "bidirectional"
+    policy = "error"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/names":
+            if "q" not in query:
+                self.send_error(400, "q is required")
+                return
+            try:
+                limit = int(query.get("limit", ["10"])[0])
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                self.send_error(400, "limit must be a positive integer")
+                return
+            try:
+                index = name_search()
+            except MemoryBudgetExceeded as e:
+                self.send_error(503, str(e))
+                return
+            answer = index.search(query["q"][0], limit=limit)
+        elif url.path == "/path":
+            if "source" not in query or "target" not in query:
+                self.send_error(400, "source and target are required")
+                return
+            answer = answer_query(query["source"][0], query["target"][0],
+                                  self.mode, self.policy)
+        else:
+            self.send_error(404)
+            return
+        self.reply("application/json", json.dumps(answer) + "\n")
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/batch":
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", "-1"))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error(400, "Content-Length must be a non-negative "
+                                 "integer")
+            return
+        lines = self.rfile.read(length).decode("utf-8").splitlines()
+        answers = io.StringIO()
+        run_batch(lines, answers, self.mode, policy=self.policy)
+        self.reply("application/x-ndjson", answers.getvalue())
+
+    def reply(self, content_type, body):
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"{self.address_string()} - {format % args}\n")
+
+
+def serve(host, port, mode="bidirectional", policy="error"):
+    """
+    Serves queries over HTTP until interrupted, keeping the loaded
+    data in memory across requests.
+    """
+    handler = type("Handler", (QueryHandler,),
+                   {"mode": mode, "policy": policy})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving on http://{host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,293 @@
+from array import array
+
+
+class CompactGraph():
+    """
+    Co-star graph stored in compressed sparse row (CSR) form.
+
+    Person and movie string ids are interned to consecutive integers.
+    The co-stars of person p are neighbours[offsets[p]:offsets[p + 1]],
+    and via holds, position for position, the movie that connects them.
+    The credits themselves are kept as two more CSR tables (the movies of
+    each person and the cast of each movie).
+
+    The CSR arrays are never modified in place. People, movies and
+    credits added or removed afterwards are kept in a small overlay that
+    the accessors merge in, until compact() folds it into fresh arrays.
+    """
+
+    # Overlay edits tolerated before compacting automatically, as a
+    # fraction of the credits in the arrays
+    COMPACT_RATIO = 0.125
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies,
+                 cast_offsets, cast,
+                 offsets, neighbours, via):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_index = {pid: i for i, pid in enumerate(person_ids)}
+        self.movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        self.set_arrays(person_offsets, person_movies, cast_offsets, cast,
+                        offsets, neighbours, via)
+
+    def set_arrays(self, person_offsets, person_movies, cast_offsets, cast,
+                   offsets, neighbours, via):
+        """Installs CSR arrays and starts an empty overlay over them."""
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.cast_offsets = cast_offsets
+        self.cast = cast
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.via = via
+
+        # People and movies interned after the arrays were built have
+        # no rows in them
+        self.base_people = len(offsets) - 1
+        self.base_movies = len(cast_offsets) - 1
+
+        # Overlay: credits added (both directions) and array credits
+        # removed, as (person, movie) pairs
+        self.added_movies = {}
+        self.added_cast = {}
+        self.removed = set()
+        self.edits = 0
+
+    @classmethod
+    def from_credits(cls, person_ids, movie_ids, credit_people, credit_movies):
+        """
+        Builds the graph from parallel arrays of interned credits, where
+        credit_people[i] starred in credit_movies[i].
+        Duplicate credits are ignored.
+        """
+        n = len(person_ids)
+        m = len(movie_ids)
+
+        # Cast of every movie, without duplicates
+        cast_offsets, cast = group(m, credit_movies, credit_people)
+        cast_offsets, cast = dedupe(cast_offsets, cast)
+
+        # Movies of every person, derived from the deduplicated casts
+        movie_of = array("i", [0]) * len(cast)
+        for movie in range(m):
+            for i in range(cast_offsets[movie], cast_offsets[movie + 1]):
+                movie_of[i] = movie
+        person_offsets, person_movies = group(n, cast, movie_of)
+
+        # Co-star adjacency: everybody else in each of a person's movies
+        offsets = array("q", [0]) * (n + 1)
+        for person in range(n):
+            degree = 0
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                degree += cast_offsets[movie + 1] - cast_offsets[movie] - 1
+            offsets[person + 1] = offsets[person] + degree
+
+        neighbours = array("i", [0]) * offsets[n]
+        via = array("i", [0]) * offsets[n]
+        position = 0
+        for person in range(n):
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                for j in range(cast_offsets[movie], cast_offsets[movie + 1]):
+                    costar = cast[j]
+                    if costar != person:
+                        neighbours[position] = costar
+                        via[position] = movie
+                        position += 1
+
+        return cls(person_ids, movie_ids, person_offsets, person_movies,
+                   cast_offsets, cast, offsets, neighbours, via)
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) pairs of interned ids for the co-stars
+        of an interned person.
+        """
+        if self.edits or person >= self.base_people:
+            return self.patched_neighbors(person)
+        start = self.offsets[person]
+        end = self.offsets[person + 1]
+        return zip(self.via[start:end], self.neighbours[start:end])
+
+    def degree(self, person):
+        """Returns how many co-star links an interned person has."""
+        if self.edits or person >= self.base_people:
+            return len(self.patched_neighbors(person))
+        return self.offsets[person + 1] - self.offsets[person]
+
+    def patched_neighbors(self, person):
+        """neighbors() with the overlay merged in."""
+        result = []
+        if person < self.base_people:
+            start = self.offsets[person]
+            end = self.offsets[person + 1]
+            removed = self.removed
+            for movie, costar in zip(self.via[start:end],
+                                     self.neighbours[start:end]):
+                if removed and ((person, movie) in removed
+                                or (costar, movie) in removed):
+                    continue
+                result.append((movie, costar))
+
+            # People added to this person's original movies
+            if self.added_cast:
+                for movie in self.base_movies_of(person):
+                    if (person, movie) in removed:
+                        continue
+                    for costar in self.added_cast.get(movie, ()):
+                        if costar != person:
+                            result.append((movie, costar))
+
+        for movie in self.added_movies.get(person, ()):
+            for costar in self.stars_of(movie):
+                if costar != person:
+                    result.append((movie, costar))
+        return result
+
+    def base_movies_of(self, person):
+        """Returns a person's movies as recorded in the arrays."""
+        if person >= self.base_people:
+            return ()
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def base_stars_of(self, movie):
+        """Returns a movie's cast as recorded in the arrays."""
+        if movie >= self.base_movies:
+            return ()
+        return self.cast[self.cast_offsets[movie]:self.cast_offsets[movie + 1]]
+
+    def movies_of(self, person):
+        """Returns the interned movies an interned person starred in."""
+        movies = self.base_movies_of(person)
+        if not self.edits:
+            return movies
+        return ([m for m in movies if (person, m) not in self.removed]
+                + list(self.added_movies.get(person, ())))
+
+    def stars_of(self, movie):
+        """Returns the interned cast of an interned movie."""
+        stars = self.base_stars_of(movie)
+        if not self.edits:
+            return stars
+        return ([p for p in stars if (p, movie) not in self.removed]
+                + list(self.added_cast.get(movie, ())))
+
+    def add_person(self, person_id):
+        """Interns a new person_id, returning its index."""
+        if person_id in self.person_index:
+            raise ValueError(f"person {person_id} already exists")
+        self.person_index[person_id] = len(self.person_ids)
+        self.person_ids.append(person_id)
+        return self.person_index[person_id]
+
+    def add_movie(self, movie_id):
+        """
+        Interns a new movie_id, returning its index. A movie_id interned
+        before whose cast has all been removed gets its old index back.
+        """
+        if movie_id in self.movie_index:
+            movie = self.movie_index[movie_id]
+            if self.stars_of(movie):
+                raise ValueError(f"movie {movie_id} already exists")
+            return movie
+        self.movie_index[movie_id] = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        return self.movie_index[movie_id]
+
+    def add_credit(self, person, movie):
+        """
+        Records that an interned person starred in an interned movie.
+        Returns False if that was already known.
+        """
+        if (person, movie) in self.removed:
+            self.removed.discard((person, movie))
+        elif (movie in self.base_movies_of(person)
+              or movie in self.added_movies.get(person, ())):
+            return False
+        else:
+            self.added_movies.setdefault(person, set()).add(movie)
+            self.added_cast.setdefault(movie, set()).add(person)
+        self.edited()
+        return True
+
+    def remove_credit(self, person, movie):
+        """
+        Forgets that an interned person starred in an interned movie.
+        Returns False if there was no such credit.
+        """
+        if movie in self.added_movies.get(person, ()):
+            self.added_movies[person].discard(movie)
+            self.added_cast[movie].discard(person)
+        elif (movie in self.base_movies_of(person)
+              and (person, movie) not in self.removed):
+            self.removed.add((person, movie))
+        else:
+            return False
+        self.edited()
+        return True
+
+    def edited(self):
+        """Counts an overlay edit, compacting once the overlay is large."""
+        self.edits += 1
+        if self.edits > max(1024, self.COMPACT_RATIO * len(self.cast)):
+            self.compact()
+
+    def compact(self):
+        """Rebuilds the CSR arrays with the overlay folded in."""
+        credit_people = array("i")
+        credit_movies = array("i")
+        for movie in range(len(self.movie_ids)):
+            for person in self.stars_of(movie):
+                credit_people.append(person)
+                credit_movies.append(movie)
+        rebuilt = CompactGraph.from_credits(
+            self.person_ids, self.movie_ids, credit_people, credit_movies
+        )
+        self.set_arrays(rebuilt.person_offsets, rebuilt.person_movies,
+                        rebuilt.cast_offsets, rebuilt.cast,
+                        rebuilt.offsets, rebuilt.neighbours, rebuilt.via)
+
+    def to_ids(self, path):
+        """
+        Translates a path of interned (movie, person) pairs back to
+        (movie_id, person_id) strings.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+
+def group(count, keys, values):
+    """
+    Counting sort of values by key into CSR form.
+    Returns (offsets, grouped values) where the values for key k are
+    grouped[offsets[k]:offsets[k + 1]].
+    """
+    offsets = array("q", [0]) * (count + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for key in range(count):
+        offsets[key + 1] += offsets[key]
+
+    grouped = array("i", [0]) * len(values)
+    fill = array("q", offsets[:-1])
+    for key, value in zip(keys, values):
+        grouped[fill[key]] = value
+        fill[key] += 1
+    return offsets, grouped
+
+
+def dedupe(offsets, values):
+    """Removes repeated values within each CSR row, keeping first order."""
+    unique_offsets = array("q", [0])
+    unique = array("i")
+    for row in range(len(offsets) - 1):
+        unique.extend(dict.fromkeys(values[offsets[row]:offsets[row + 1]]))
+        unique_offsets.append(len(unique))
+    return unique_offsets, unique
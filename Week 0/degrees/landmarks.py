@@ -0,0 +1,217 @@
+import heapq
+import math
+from array import array
+from collections import deque
+
+# Distances are stored as signed bytes: -1 for unreachable, and anything
+# further than MAX_DISTANCE hops is recorded as MAX_DISTANCE. Clamping
+# never overestimates a difference of distances, so bounds stay valid.
+UNREACHABLE = -1
+MAX_DISTANCE = 127
+
+
+def single_source_distances(graph, source):
+    """
+    Breadth-first search over a CompactGraph from an interned person.
+    Returns an array("b") of hop counts indexed by interned person.
+    """
+    distances = array("b", [UNREACHABLE]) * len(graph)
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth = min(depth + 1, MAX_DISTANCE)
+        next_frontier = []
+        for person in frontier:
+            for _, costar in graph.neighbors(person):
+                if distances[costar] == UNREACHABLE:
+                    distances[costar] = depth
+                    next_frontier.append(costar)
+        frontier = next_frontier
+    return distances
+
+
+def choose_hubs(graph, count):
+    """Returns the count interned people with the most co-star links."""
+    return heapq.nlargest(count, range(len(graph)), key=graph.degree)
+
+
+class LandmarkIndex():
+    """
+    ALT (A*, landmarks, triangle inequality) index over a CompactGraph.
+
+    Holds the distance from each landmark to every person. For any
+    landmark L the triangle inequality gives
+        |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+    which bounds distances without searching and yields an admissible,
+    consistent heuristic for A*.
+    """
+
+    def __init__(self, graph, landmarks):
+        self.graph = graph
+        self.landmarks = list(landmarks)
+        self.distances = [single_source_distances(graph, landmark)
+                          for landmark in self.landmarks]
+        self.position = {landmark: i
+                         for i, landmark in enumerate(self.landmarks)}
+
+    def lower_bound(self, source, target):
+        """
+        Returns a lower bound on the hops from source to target,
+        or math.inf if some landmark proves them disconnected.
+        """
+        bound = 0
+        for distances in self.distances:
+            s = distances[source]
+            t = distances[target]
+            if (s == UNREACHABLE) != (t == UNREACHABLE):
+                return math.inf
+            if s != UNREACHABLE and abs(s - t) > bound:
+                bound = abs(s - t)
+        return bound
+
+    def upper_bound(self, source, target):
+        """
+        Returns an upper bound on the hops from source to target through
+        a landmark, or math.inf if no landmark reaches both.
+        """
+        bound = math.inf
+        for distances in self.distances:
+            s = distances[source]
+            t = distances[target]
+            if (s != UNREACHABLE and t != UNREACHABLE
+                    and s < MAX_DISTANCE and t < MAX_DISTANCE):
+                bound = min(bound, s + t)
+        return bound
+
+    def exact_distance(self, source, target):
+        """
+        Returns the hops from source to target if the index alone
+        determines them (None when unreachable), otherwise raises
+        LookupError so the caller can fall back to search.
+        """
+        for person, other in ((source, target), (target, source)):
+            if person in self.position:
+                distance = self.distances[self.position[person]][other]
+                if distance == UNREACHABLE:
+                    return None
+                if distance < MAX_DISTANCE:
+                    return distance
+
+        lower = self.lower_bound(source, target)
+        if lower == math.inf:
+            return None
+        if lower == self.upper_bound(source, target):
+            return lower
+        raise LookupError("distance not determined by landmarks")
+
+    def edges_added(self, pairs):
+        """
+        Updates the distances after the co-star links between the
+        interned (person, person) pairs appeared. Distances can only
+        shrink, so each improvement is propagated outwards from the
+        pair by breadth-first relaxation.
+        """
+        self.grow()
+        for distances in self.distances:
+            queue = deque()
+            for u, v in pairs:
+                for a, b in ((u, v), (v, u)):
+                    if relax(distances, a, b):
+                        queue.append(b)
+            while queue:
+                person = queue.popleft()
+                for _, costar in self.graph.neighbors(person):
+                    if relax(distances, person, costar):
+                        queue.append(costar)
+
+    def edges_removed(self, pairs):
+        """
+        Updates the distances after the co-star links between the
+        interned (person, person) pairs disappeared. A landmark is only
+        affected if one of the links joined people at different
+        distances from it; those landmarks are recomputed.
+        """
+        self.grow()
+        for i, distances in enumerate(self.distances):
+            for u, v in pairs:
+                if (distances[u] != distances[v]
+                        or distances[u] == MAX_DISTANCE):
+                    self.distances[i] = single_source_distances(
+                        self.graph, self.landmarks[i]
+                    )
+                    break
+
+    def grow(self):
+        """Extends the distance arrays to people added to the graph."""
+        for distances in self.distances:
+            missing = len(self.graph) - len(distances)
+            if missing > 0:
+                distances.extend(array("b", [UNREACHABLE]) * missing)
+
+    def heuristic(self, target):
+        """Returns the A* heuristic h(person) for paths towards target."""
+        return lambda person: self.lower_bound(person, target)
+
+
+def relax(distances, person, costar):
+    """
+    Lowers costar's distance to one more than person's if that is
+    shorter. Returns whether it changed.
+    """
+    if distances[person] == UNREACHABLE:
+        return False
+    distance = min(distances[person] + 1, MAX_DISTANCE)
+    if distances[costar] == UNREACHABLE or distance < distances[costar]:
+        distances[costar] = distance
+        return True
+    return False
+
+
+def astar_search(source, target, neighbors, heuristic, stats=None):
+    """
+    A* search for the shortest list of (action, state) pairs from
+    source to target with unit step costs.
+
+    heuristic must be consistent; with the ALT heuristic the first time
+    a state is popped its distance is final. stats, if given, is a
+    SearchStats recording each expansion.
+    """
+    if heuristic(source) == math.inf:
+        return None
+
+    parents = {source: None}
+    cost = {source: 0}
+    closed = set()
+    counter = 0
+    frontier = [(heuristic(source), counter, source)]
+
+    while frontier:
+        _, _, state = heapq.heappop(frontier)
+        if state in closed:
+            continue
+        if state == target:
+            path = []
+            while parents[state] is not None:
+                action, parent = parents[state]
+                path.append((action, state))
+                state = parent
+            path.reverse()
+            return path
+        closed.add(state)
+        if stats is not None:
+            stats.expand(len(frontier) + 1)
+
+        g = cost[state] + 1
+        for action, neighbour in neighbors(state):
+            if neighbour in closed or cost.get(neighbour, math.inf) <= g:
+                continue
+            h = heuristic(neighbour)
+            if h == math.inf:
+                continue
+            cost[neighbour] = g
+            parents[neighbour] = (action, state)
+            counter += 1
+            heapq.heappush(frontier, (g + h, counter, neighbour))
+
+    return None
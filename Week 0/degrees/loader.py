@@ -0,0 +1,427 @@
+import csv
+import sys
+from array import array
+from collections.abc import Mapping
+from itertools import islice
+
+from graph import CompactGraph
+
+# Rows parsed per chunk
+CHUNK_SIZE = 65536
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """Raised when loading would hold more than the memory budget."""
+
+
+class LoadReport():
+    """
+    Counts of what a StreamingLoader kept and dropped, and of the bytes
+    it holds and held at most.
+    """
+
+    def __init__(self):
+        self.people = 0
+        self.movies = 0
+        self.credits = 0
+        self.duplicate_credits = 0
+        self.dangling_people = 0
+        self.dangling_movies = 0
+        self.outside_subgraph = 0
+        self.bytes = 0
+        self.peak = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        counts = ", ".join(f"{key}={value}" for key, value in vars(self).items())
+        return f"LoadReport({counts})"
+
+
+class Records(Mapping):
+    """
+    View presenting typed columns as the id -> dictionary tables
+    degrees.py works with. Dictionaries are built on access. Records
+    cannot be changed, only appended for newly interned ids, deleted,
+    or set again once deleted.
+    """
+
+    def __init__(self, index, columns):
+        self.index = index
+        self.columns = columns
+        self.deleted = set()
+
+    def __getitem__(self, key):
+        if key in self.deleted:
+            raise KeyError(key)
+        i = self.index[key]
+        record = {}
+        for field, column in self.columns.items():
+            value = column[i]
+            if isinstance(column, array):
+                # Zero marks an unknown year
+                value = str(value) if value else ""
+            record[field] = value
+        return record
+
+    def __setitem__(self, key, record):
+        """
+        Appends the record for a key just added to the index, or
+        overwrites that of a deleted key; existing records cannot be
+        changed.
+        """
+        i = self.index.get(key)
+        size = len(next(iter(self.columns.values())))
+        if i is None or not (i == size or key in self.deleted):
+            raise TypeError("records can only be set for new or deleted ids")
+        for field, column in self.columns.items():
+            value = record[field]
+            if isinstance(column, array):
+                value = to_year(value)
+            if i == size:
+                column.append(value)
+            else:
+                column[i] = value
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.deleted.add(key)
+
+    def __iter__(self):
+        return (key for key in self.index if key not in self.deleted)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) - len(self.deleted)
+
+    def __contains__(self, key):
+        return key in self.index and key not in self.deleted
+
+
+class StringColumn():
+    """
+    Column of strings stored as UTF-8 bytes one after another, with
+    string i at data[offsets[i]:offsets[i + 1]]. Strings are decoded on
+    access, so the bytes can stay in a memory map until needed. Strings
+    appended or replaced later are kept aside.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+        self.base = len(offsets) - 1
+        self.added = []
+        self.replaced = {}
+
+    @classmethod
+    def from_strings(cls, strings):
+        """Packs strings into an offsets array and their bytes."""
+        offsets = array("q", [0])
+        data = bytearray()
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return cls(offsets, bytes(data))
+
+    def __len__(self):
+        return self.base + len(self.added)
+
+    def __getitem__(self, i):
+        if i >= self.base:
+            return self.added[i - self.base]
+        if i in self.replaced:
+            return self.replaced[i]
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __setitem__(self, i, string):
+        if i >= self.base:
+            self.added[i - self.base] = string
+        else:
+            self.replaced[i] = string
+
+    def append(self, string):
+        self.added.append(string)
+
+
+class StreamingLoader():
+    """
+    Loads a degrees data directory chunk by chunk into interned, typed
+    columns and a CompactGraph, without per-row dictionaries or sets.
+
+    Memory held is tallied as it grows (as sys.getsizeof counts it,
+    including what is held only while loading), and MemoryBudgetExceeded
+    is raised as soon as it passes memory_budget bytes (if given).
+    Optionally only people within a number of hops of seed people are
+    kept, which costs two extra passes over stars.csv per hop.
+    """
+
+    def __init__(self, directory, memory_budget=None, chunk_size=CHUNK_SIZE):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.chunk_size = chunk_size
+        self.report = LoadReport()
+
+    def load(self, seeds=None, hops=None):
+        """
+        Returns (graph, people, movies, names): people and movies are
+        Records views and names maps lowercase names to person_id sets.
+        With seeds (person_ids) and hops, only the people within hops
+        co-star links of a seed are loaded.
+        """
+        keep = None
+        if seeds is not None:
+            keep = self.reachable(set(seeds), hops)
+
+        person_ids = []
+        person_index = {}
+        person_names = []
+        births = array("h")
+        names = {}
+        self.charge(sum(map(sys.getsizeof, (
+            person_ids, person_index, person_names, births, names
+        ))))
+        for row in self.rows("people.csv"):
+            person_id, name, birth = row[0], row[1], row[2]
+            if keep is not None and person_id not in keep:
+                continue
+            i = len(person_ids)
+            self.charge(sys.getsizeof(person_id) + sys.getsizeof(name)
+                        + sys.getsizeof(i))
+            put(person_index, person_id, i, self.charge)
+            append(person_ids, person_id, self.charge)
+            append(person_names, name, self.charge)
+            append(births, to_year(birth), self.charge)
+            key = name.lower()
+            if key not in names:
+                ids = set()
+                self.charge(sys.getsizeof(key) + sys.getsizeof(ids))
+                put(names, key, ids, self.charge)
+            add(names[key], person_id, self.charge)
+        self.report.people = len(person_ids)
+
+        # Only movies somebody kept starred in are needed for a subgraph
+        wanted = None
+        if keep is not None:
+            wanted = set()
+            self.charge(sys.getsizeof(wanted))
+            for person_id, movie_id in self.rows("stars.csv"):
+                if person_id in person_index and movie_id not in wanted:
+                    self.charge(sys.getsizeof(movie_id))
+                    add(wanted, movie_id, self.charge)
+
+        movie_ids = []
+        movie_index = {}
+        titles = []
+        years = array("h")
+        self.charge(sum(map(sys.getsizeof, (
+            movie_ids, movie_index, titles, years
+        ))))
+        for row in self.rows("movies.csv"):
+            movie_id, title, year = row[0], row[1], row[2]
+            if wanted is not None and movie_id not in wanted:
+                continue
+            i = len(movie_ids)
+            self.charge(sys.getsizeof(movie_id) + sys.getsizeof(title)
+                        + sys.getsizeof(i))
+            put(movie_index, movie_id, i, self.charge)
+            append(movie_ids, movie_id, self.charge)
+            append(titles, title, self.charge)
+            append(years, to_year(year), self.charge)
+        self.report.movies = len(movie_ids)
+        if wanted is not None:
+            self.charge(-set_bytes(wanted))
+            del wanted
+
+        credit_people = array("i")
+        credit_movies = array("i")
+        self.charge(2 * sys.getsizeof(credit_people))
+        for person_id, movie_id in self.rows("stars.csv"):
+            person = person_index.get(person_id)
+            movie = movie_index.get(movie_id)
+            if person is None or movie is None:
+                if keep is not None and person_id not in keep:
+                    self.report.outside_subgraph += 1
+                else:
+                    if person is None:
+                        self.report.dangling_people += 1
+                    if movie is None:
+                        self.report.dangling_movies += 1
+                continue
+            # The two arrays grow in step, so measuring one will do
+            size = sys.getsizeof(credit_people)
+            credit_people.append(person)
+            credit_movies.append(movie)
+            grown(2 * size, 2 * sys.getsizeof(credit_people), self.charge)
+        if keep is not None:
+            self.charge(-set_bytes(keep))
+            del keep
+
+        graph = CompactGraph.from_credits(
+            person_ids, movie_ids, credit_people, credit_movies
+        )
+        self.report.credits = len(graph.cast)
+        self.report.duplicate_credits = len(credit_people) - len(graph.cast)
+
+        # The graph, which while being built also held every cast
+        # credit's movie, replaces the raw credit arrays and the id
+        # indexes built here (it has its own)
+        building = 4 * len(graph.cast)
+        self.charge(graph_bytes(graph) + building)
+        self.charge(-building - sys.getsizeof(credit_people)
+                    - sys.getsizeof(credit_movies)
+                    - index_bytes(person_index) - index_bytes(movie_index))
+        del credit_people, credit_movies, person_index, movie_index
+
+        people = Records(graph.person_index,
+                         {"name": person_names, "birth": births})
+        movies = Records(graph.movie_index,
+                         {"title": titles, "year": years})
+        return graph, people, movies, names
+
+    def find_people(self, wanted_names):
+        """Returns the person_ids of everybody with one of the names."""
+        wanted = {name.lower() for name in wanted_names}
+        return {row[0] for row in self.rows("people.csv")
+                if row[1].lower() in wanted}
+
+    def reachable(self, seeds, hops):
+        """
+        Returns the person_ids within hops co-star links of seeds, by
+        streaming stars.csv twice per hop: once for the movies of the
+        current frontier, once for everybody else in those movies.
+        The returned set stays charged to the budget.
+        """
+        reached = set()
+        self.charge(sys.getsizeof(reached))
+        for person_id in seeds:
+            self.charge(sys.getsizeof(person_id))
+            add(reached, person_id, self.charge)
+        frontier = set(reached)
+        self.charge(sys.getsizeof(frontier))
+        for _ in range(hops if hops is not None else sys.maxsize):
+            if not frontier:
+                break
+            movies = set()
+            self.charge(sys.getsizeof(movies))
+            for person_id, movie_id in self.rows("stars.csv"):
+                if person_id in frontier and movie_id not in movies:
+                    self.charge(sys.getsizeof(movie_id))
+                    add(movies, movie_id, self.charge)
+
+            found = set()
+            self.charge(sys.getsizeof(found))
+            for person_id, movie_id in self.rows("stars.csv"):
+                if (movie_id in movies and person_id not in reached
+                        and person_id not in found):
+                    self.charge(sys.getsizeof(person_id))
+                    add(found, person_id, self.charge)
+            self.charge(-set_bytes(movies))
+            del movies
+
+            # The people found move into reached, already charged
+            for person_id in found:
+                add(reached, person_id, self.charge)
+            self.charge(-sys.getsizeof(frontier))
+            frontier = found
+        self.charge(-sys.getsizeof(frontier))
+        return reached
+
+    def rows(self, filename):
+        """
+        Yields the data rows of a CSV file, parsed a chunk at a time.
+        Each chunk is charged to the budget while it is held.
+        """
+        with open(f"{self.directory}/{filename}", encoding="utf-8",
+                  newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            while True:
+                chunk = list(islice(reader, self.chunk_size))
+                if not chunk:
+                    break
+                size = sys.getsizeof(chunk) + sum(
+                    sys.getsizeof(row) + sum(map(sys.getsizeof, row))
+                    for row in chunk
+                )
+                self.charge(size)
+                yield from chunk
+                # Let go of this chunk before reading the next
+                del chunk
+                self.charge(-size)
+
+    def charge(self, size):
+        """
+        Accounts for size more bytes held (or fewer, if negative),
+        enforcing the budget.
+        """
+        self.report.bytes += size
+        self.report.peak = max(self.report.peak, self.report.bytes)
+        if (self.memory_budget is not None
+                and self.report.bytes > self.memory_budget):
+            raise MemoryBudgetExceeded(
+                f"loading {self.directory} needs more than "
+                f"{self.memory_budget} bytes"
+            )
+
+
+def append(values, value, charge):
+    """Appends value to a list or array, charging for its growth."""
+    size = sys.getsizeof(values)
+    values.append(value)
+    grown(size, sys.getsizeof(values), charge)
+
+
+def add(members, value, charge):
+    """Adds value to a set, charging for its growth."""
+    size = sys.getsizeof(members)
+    members.add(value)
+    grown(size, sys.getsizeof(members), charge)
+
+
+def put(table, key, value, charge):
+    """Sets key in a dictionary, charging for its growth."""
+    size = sys.getsizeof(table)
+    table[key] = value
+    grown(size, sys.getsizeof(table), charge)
+
+
+def grown(size, new_size, charge):
+    """
+    Charges for a container reallocated from size to new_size bytes,
+    counting both while the contents were copied across.
+    """
+    if new_size != size:
+        charge(new_size)
+        charge(-size)
+
+
+def set_bytes(values):
+    """Returns the bytes held by a set of strings, strings included."""
+    return sys.getsizeof(values) + sum(map(sys.getsizeof, values))
+
+
+def index_bytes(index):
+    """Returns the bytes held by an id -> int dictionary, ints included."""
+    return sys.getsizeof(index) + sum(map(sys.getsizeof, index.values()))
+
+
+def to_year(text):
+    """Parses a year column, 0 if missing or malformed."""
+    try:
+        return int(text)
+    except ValueError:
+        return 0
+
+
+def graph_bytes(graph):
+    """
+    Returns the bytes held by a CompactGraph's arrays and id indexes
+    (the id lists themselves are the loader's).
+    """
+    return (index_bytes(graph.person_index) + index_bytes(graph.movie_index)
+            + sum(map(sys.getsizeof, (
+                graph.person_offsets, graph.person_movies, graph.cast_offsets,
+                graph.cast, graph.offsets, graph.neighbours, graph.via
+            ))))
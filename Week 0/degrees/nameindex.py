@@ -0,0 +1,294 @@
+import heapq
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from loader import append, put
+
+
+class NameIndex():
+    """
+    Search structure over people's names, built once after loading.
+
+    Names are matched case-insensitively. Every distinct name has a
+    fixed position, in the order the names were first seen; a sorted
+    copy of the names (with their positions) serves exact and prefix
+    search by bisection, and an inverted index from (length, gram) to
+    positions serves fuzzy search ranked by edit distance.
+    """
+
+    # Names this long or shorter are also indexed by bigrams, for
+    # queries too short for their trigrams to filter anything
+    SHORT = 7
+
+    def __init__(self, people, weight=None, charge=None):
+        """
+        people maps person_id to a dictionary with "name" and "birth".
+        weight(person_id), if given, ranks otherwise equal candidates
+        (higher first), e.g. by number of credits. charge(size), if
+        given, is called with the bytes (as sys.getsizeof counts them)
+        the index takes as it is built (not as people are added later),
+        and may raise to stop building.
+        """
+        self.people = people
+        self.weight = weight if weight is not None else (lambda person_id: 0)
+        if charge is None:
+            charge = uncharged
+
+        # Distinct names by position, with their person_ids alongside,
+        # and the fuzzy search index over them
+        self.names = []
+        self.ids = []
+        self.position = {}
+        self.grams = {}
+        self.by_length = {}
+        self.signatures = array("Q")
+        charge(sum(map(sys.getsizeof, (
+            self.names, self.ids, self.position, self.grams, self.by_length,
+            self.signatures
+        ))))
+        for person_id, person in people.items():
+            self.insert(person_id, person["name"].lower(), charge)
+
+        # Names in sorted order, with their positions alongside; sorting
+        # the positions holds a list of keys for a while
+        count = len(self.names)
+        slots = sys.getsizeof([]) + 8 * count
+        charge(3 * slots + sum(map(sys.getsizeof, range(count))))
+        self.sorted_names = sorted(self.names)
+        self.sorted_positions = sorted(range(count),
+                                       key=self.names.__getitem__)
+        charge(-slots)
+
+    def insert(self, person_id, name, charge):
+        """
+        Indexes person_id under its lowercase name, charging what that
+        takes, and returns the name's position if it is new, else None.
+        """
+        i = self.position.get(name)
+        if i is not None:
+            append(self.ids[i], person_id, charge)
+            return None
+
+        i = len(self.names)
+        ids = [person_id]
+        charge(sys.getsizeof(name) + sys.getsizeof(ids)
+                    + sys.getsizeof(i))
+        append(self.names, name, charge)
+        append(self.ids, ids, charge)
+        put(self.position, name, i, charge)
+
+        length = len(name)
+        grams = set(split_trigrams(name))
+        if length <= self.SHORT:
+            grams.update(split_bigrams(name))
+        for gram in grams:
+            key = (length, gram)
+            if key not in self.grams:
+                positions = array("i")
+                charge(sys.getsizeof(key) + sys.getsizeof(gram)
+                            + sys.getsizeof(positions))
+                put(self.grams, key, positions, charge)
+            append(self.grams[key], i, charge)
+        if length not in self.by_length:
+            positions = array("i")
+            charge(sys.getsizeof(positions))
+            put(self.by_length, length, positions, charge)
+        append(self.by_length[length], i, charge)
+        append(self.signatures, signature(name), charge)
+        return i
+
+    def add(self, person_id):
+        """Indexes a person added to people after the index was built."""
+        name = self.people[person_id]["name"].lower()
+        i = self.insert(person_id, name, uncharged)
+        if i is not None:
+            at = bisect_left(self.sorted_names, name)
+            self.sorted_names.insert(at, name)
+            self.sorted_positions.insert(at, i)
+
+    def exact(self, name):
+        """Returns candidates whose name is exactly name."""
+        name = name.lower()
+        if name in self.position:
+            return self.candidates([(0, self.position[name])])
+        return []
+
+    def prefix(self, prefix, limit=10):
+        """Returns up to limit candidates whose name starts with prefix."""
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.sorted_names, prefix)
+        while (i < len(self.sorted_names)
+               and self.sorted_names[i].startswith(prefix)
+               and len(matches) < limit):
+            matches.append((len(self.sorted_names[i]) - len(prefix),
+                            self.sorted_positions[i]))
+            i += 1
+        return self.candidates(matches, limit)
+
+    def fuzzy(self, name, max_edits=2, limit=10):
+        """
+        Returns up to limit candidates within max_edits edits of name,
+        closest first.
+
+        Names passing the gram filter are screened by their signatures,
+        and only those left are compared character by character.
+        """
+        name = name.lower()
+        query = signature(name)
+        matches = []
+        for i in self.filter(name, max_edits):
+            other = self.signatures[i]
+            if ((query & ~other).bit_count() > max_edits
+                    or (other & ~query).bit_count() > max_edits):
+                continue
+            distance = edit_distance(name, self.names[i], max_edits)
+            if distance <= max_edits:
+                matches.append((distance, i))
+        return self.candidates(matches, limit)
+
+    def filter(self, name, max_edits):
+        """
+        Yields the positions of names that may be within max_edits edits
+        of name, a superset of those that are.
+
+        Each edit destroys at most q of a name's q-grams, so a match
+        shares at least needed = len(grams) - q * max_edits of the
+        query's, and its length differs by at most max_edits; the index
+        is keyed by length so only those lengths' postings are read.
+        Common grams have long postings, so only the shortest are
+        counted: a match must still appear in at least 2 of all but the
+        needed - 2 longest. Queries too short for their trigrams to
+        filter anything fall back to bigrams, or, failing that, to every
+        name of a matching length.
+        """
+        trigrams = set(split_trigrams(name))
+        bigrams = set(split_bigrams(name))
+        for length in range(max(len(name) - max_edits, 0),
+                            len(name) + max_edits + 1):
+            if len(trigrams) > 3 * max_edits:
+                grams, needed = trigrams, len(trigrams) - 3 * max_edits
+            elif len(bigrams) > 2 * max_edits and length <= self.SHORT:
+                grams, needed = bigrams, len(bigrams) - 2 * max_edits
+            else:
+                yield from self.by_length.get(length, ())
+                continue
+            postings = sorted((self.grams.get((length, gram), ())
+                               for gram in grams), key=len)
+            threshold = min(needed, 2)
+            counts = Counter()
+            for positions in postings[:len(postings) - needed + threshold]:
+                counts.update(positions)
+            for i, count in counts.items():
+                if count >= threshold:
+                    yield i
+
+    def search(self, name, limit=10, max_edits=2):
+        """
+        Returns ranked candidates for name: exact matches, else names
+        starting with it, else fuzzy matches.
+        """
+        return (self.exact(name) or self.prefix(name, limit)
+                or self.fuzzy(name, max_edits, limit))
+
+    def candidates(self, matches, limit=None):
+        """
+        Expands (distance, name position) matches into candidate
+        dictionaries, ranked by distance, then weight, then name, keeping
+        the first limit (or all).
+        """
+        ranked = [(distance, -self.weight(person_id), person_id)
+                  for distance, i in matches for person_id in self.ids[i]]
+        if limit and len(ranked) > limit:
+            # Only people ranked no lower than the limit-th by distance
+            # and weight can make the cut
+            cutoff = heapq.nsmallest(limit, ranked)[-1][:2]
+            ranked = [entry for entry in ranked if entry[:2] <= cutoff]
+
+        found = []
+        for distance, weight, person_id in ranked:
+            person = self.people[person_id]
+            found.append((distance, weight, person["name"], person_id,
+                          person["birth"]))
+        found.sort()
+        return [{"person_id": person_id, "name": name, "birth": birth,
+                 "distance": distance}
+                for distance, weight, name, person_id, birth in found[:limit]]
+
+
+def uncharged(size):
+    """Ignores a charge, for building without a memory budget."""
+
+
+def split_trigrams(name):
+    """Returns the trigrams of name, padded so word edges count."""
+    padded = f"  {name} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def split_bigrams(name):
+    """Returns the bigrams of name, padded so word edges count."""
+    padded = f" {name} "
+    return [padded[i:i + 2] for i in range(len(padded) - 1)]
+
+
+def signature(name):
+    """
+    Returns a 64-bit summary of which characters name holds: bit c is
+    set for a character hashing to c (of 32), and bit c + 32 if such a
+    character appears twice. Every bit one name's signature has and
+    another's lacks takes an edit to fix, so counting them bounds the
+    edit distance from below.
+    """
+    bits = 0
+    for c in name:
+        bit = 1 << (ord(c) & 31)
+        bits |= bit << 32 if bits & bit else bit
+    return bits
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance between a and b, or limit + 1 as soon as it is
+    known to exceed limit.
+
+    Uses Myers' bit-parallel algorithm (in Hyyro's formulation): a whole
+    column of the dynamic programming table is kept as bit vectors of
+    vertical +1/-1 steps, so each character of b costs a few integer
+    operations instead of a loop over a.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if not a:
+        return len(b)
+
+    matches = {}
+    for i, c in enumerate(a):
+        matches[c] = matches.get(c, 0) | (1 << i)
+
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    plus = mask
+    minus = 0
+    score = len(a)
+    remaining = len(b)
+    for c in b:
+        equal = matches.get(c, 0)
+        vertical = equal | minus
+        horizontal = (((equal & plus) + plus) ^ plus) | equal
+        horizontal_plus = minus | ~(horizontal | plus)
+        horizontal_minus = plus & horizontal
+        if horizontal_plus & last:
+            score += 1
+        elif horizontal_minus & last:
+            score -= 1
+        remaining -= 1
+        if score - remaining > limit:
+            return limit + 1
+        horizontal_plus = (horizontal_plus << 1) | 1
+        horizontal_minus <<= 1
+        plus = (horizontal_minus | ~(vertical | horizontal_plus)) & mask
+        minus = horizontal_plus & vertical & mask
+    return min(score, limit + 1)
@@ -0,0 +1,103 @@
+def distances_to(target, neighbors):
+    """
+    Breadth-first search outwards from target.
+    Returns a dictionary of state -> hops to target for every state
+    connected to it (co-starring is symmetric, so distances from target
+    are distances to it).
+    """
+    distances = {target: 0}
+    frontier = [target]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for state in frontier:
+            for _, neighbour in neighbors(state):
+                if neighbour not in distances:
+                    distances[neighbour] = depth
+                    next_frontier.append(neighbour)
+        frontier = next_frontier
+    return distances
+
+
+def enumerate_paths(source, target, neighbors, max_length=None,
+                    shortest_only=False):
+    """
+    Lazily yields the simple paths from source to target as lists of
+    (action, state) pairs, shortest first.
+
+    A single breadth-first search from target gives every state's
+    distance to it. Paths of each length are then found by depth-first
+    search that abandons any branch which can no longer reach target
+    within that length, so no search is repeated per path.
+    """
+    distances = distances_to(target, neighbors)
+    if source not in distances:
+        return
+
+    shortest = distances[source]
+    if shortest_only:
+        lengths = [shortest]
+    else:
+        # No simple path can be longer than its component allows
+        longest = len(distances) - 1
+        if max_length is not None:
+            longest = min(longest, max_length)
+        lengths = range(shortest, longest + 1)
+
+    for length in lengths:
+        yield from paths_of_length(source, target, neighbors, distances,
+                                   length)
+
+
+def paths_of_length(source, target, neighbors, distances, length):
+    """
+    Yields the simple paths from source to target with exactly length
+    steps, pruning with the distances to target.
+    """
+    if source == target:
+        if length == 0:
+            yield []
+        return
+
+    path = []
+    on_path = {source}
+    stack = [iter(neighbors(source))]
+    while stack:
+        depth = len(stack)
+        for action, state in stack[-1]:
+            if state in on_path:
+                continue
+            remaining = distances.get(state)
+            if remaining is None or depth + remaining > length:
+                continue
+            if state == target:
+                if depth == length:
+                    yield path + [(action, state)]
+                continue
+            path.append((action, state))
+            on_path.add(state)
+            stack.append(iter(neighbors(state)))
+            break
+        else:
+            stack.pop()
+            if path:
+                on_path.discard(path.pop()[1])
+
+
+def filtered(neighbors, allow_action=None, exclude=()):
+    """
+    Wraps a neighbors function to skip actions for which allow_action
+    is false and states in exclude.
+    """
+    exclude = set(exclude)
+
+    def neighbours(state):
+        for action, neighbour in neighbors(state):
+            if neighbour in exclude:
+                continue
+            if allow_action is not None and not allow_action(action):
+                continue
+            yield action, neighbour
+
+    return neighbours
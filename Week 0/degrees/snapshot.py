@@ -0,0 +1,180 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import CompactGraph
+from loader import Records, StringColumn, to_year
+
+# Bump VERSION whenever the layout below or CompactGraph's arrays change;
+# snapshots written by another version are ignored and rebuilt.
+MAGIC = b"DEGSNAP\0"
+VERSION = 2
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+ARRAYS = ("person_offsets", "person_movies", "cast_offsets", "cast",
+          "offsets", "neighbours", "via")
+
+# String columns, each stored as an offsets array and a bytes section,
+# and year columns
+STRINGS = ("person_ids", "movie_ids", "names", "titles")
+YEARS = ("births", "years")
+
+# magic, version, header length
+PREAMBLE = struct.Struct("<8sII")
+
+
+def snapshot_path(directory):
+    """Returns where the snapshot for a data directory lives."""
+    return os.path.join(directory, FILENAME)
+
+
+def snapshot_key(directory):
+    """
+    Identifies the CSV files a snapshot was built from by their
+    sizes and modification times.
+    """
+    key = {}
+    for name in SOURCES:
+        info = os.stat(os.path.join(directory, name))
+        key[name] = [info.st_size, info.st_mtime_ns]
+    return key
+
+
+def write_snapshot(path, key, graph, people, movies):
+    """
+    Writes graph and the person and movie tables to path.
+
+    Layout: preamble, JSON header, then typed arrays: the graph's, and
+    the tables as columns (strings as UTF-8 bytes with an offsets
+    array, years as 16-bit ints). Each array is 8-byte aligned so it can
+    be cast straight out of a memory map.
+    """
+    strings = {
+        "person_ids": graph.person_ids,
+        "movie_ids": graph.movie_ids,
+        "names": [people[person_id]["name"]
+                  for person_id in graph.person_ids],
+        "titles": [movies[movie_id]["title"]
+                   for movie_id in graph.movie_ids],
+    }
+    sections = {name: getattr(graph, name) for name in ARRAYS}
+    for name, values in strings.items():
+        column = StringColumn.from_strings(values)
+        sections[f"{name}.offsets"] = column.offsets
+        sections[f"{name}.data"] = array("B", column.data)
+    sections["births"] = array("h", [to_year(people[person_id]["birth"])
+                                     for person_id in graph.person_ids])
+    sections["years"] = array("h", [to_year(movies[movie_id]["year"])
+                                    for movie_id in graph.movie_ids])
+
+    # Lay out the sections relative to the end of the header
+    layout = {}
+    position = 0
+    for name, values in sections.items():
+        layout[name] = [position, values.typecode, len(values)]
+        position = align(position + len(values) * values.itemsize)
+
+    header = json.dumps({
+        "key": key,
+        "byteorder": sys.byteorder,
+        "arrays": layout,
+    }).encode("utf-8")
+    header += b" " * (align(PREAMBLE.size + len(header)) - PREAMBLE.size
+                      - len(header))
+
+    # Write beside the target and swap it in, so readers never see
+    # a half-written snapshot
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        base = f.tell()
+        for name, values in sections.items():
+            f.seek(base + layout[name][0])
+            values.tofile(f)
+        f.truncate(base + position)
+    os.replace(temporary, path)
+
+
+def read_snapshot(path, key):
+    """
+    Memory-maps the snapshot at path.
+
+    Returns (graph, people, movies), where people and movies are
+    Records views, or None if there is no snapshot or it was written by
+    another version or from other files. The graph's arrays and the
+    names and titles are views into the map, paged in lazily; only the
+    ids (to index them) and the years are copied out.
+
+    Reading a snapshot runs no code from it, but it is trusted to be
+    well-formed: one crafted to hold out-of-range offsets can make
+    searches fail.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            return None
+
+    header = read_header(data, key)
+    if header is None:
+        data.close()
+        return None
+
+    base = PREAMBLE.size + header["length"]
+    view = memoryview(data)
+    sections = {}
+    for name, (start, typecode, count) in header["arrays"].items():
+        start += base
+        itemsize = struct.calcsize(typecode)
+        sections[name] = view[start:start + count * itemsize].cast(typecode)
+
+    columns = {name: StringColumn(sections[f"{name}.offsets"],
+                                  sections[f"{name}.data"])
+               for name in STRINGS}
+    person_ids = [columns["person_ids"][i]
+                  for i in range(len(columns["person_ids"]))]
+    movie_ids = [columns["movie_ids"][i]
+                 for i in range(len(columns["movie_ids"]))]
+    graph = CompactGraph(person_ids, movie_ids,
+                         **{name: sections[name] for name in ARRAYS})
+
+    people = Records(graph.person_index,
+                     {"name": columns["names"],
+                      "birth": array("h", sections["births"])})
+    movies = Records(graph.movie_index,
+                     {"title": columns["titles"],
+                      "year": array("h", sections["years"])})
+    return graph, people, movies
+
+
+def read_header(data, key):
+    """
+    Returns the JSON header of the mapped snapshot, with its length
+    added, or None unless it is this version's and was built from the
+    files key identifies.
+    """
+    if len(data) < PREAMBLE.size:
+        return None
+    magic, version, length = PREAMBLE.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    header = json.loads(data[PREAMBLE.size:PREAMBLE.size + length])
+    if header["key"] != key or header["byteorder"] != sys.byteorder:
+        return None
+    header["length"] = length
+    return header
+
+
+def align(position):
+    """Rounds position up to a multiple of 8."""
+    return (position + 7) & ~7
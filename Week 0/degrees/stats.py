@@ -0,0 +1,84 @@
+import time
+import tracemalloc
+
+
+FIELDS = ("nodes_expanded", "frontier_peak", "neighbor_calls",
+          "neighbor_time", "wall_time", "memory_peak", "path_length")
+
+
+class SearchStats():
+    """
+    Cost of one search, filled in when passed to degrees.shortest_path:
+
+        nodes_expanded   states whose neighbours were generated
+        frontier_peak    largest frontier size seen (both sides together
+                         for a bidirectional search)
+        neighbor_calls   calls to the neighbours function
+        neighbor_time    seconds spent generating neighbours
+        wall_time        seconds for the whole search
+        memory_peak      peak bytes allocated during the search, if
+                         trace_memory (slow: it enables tracemalloc)
+        path_length      steps in the path found, None if not connected
+
+    callback, if given, is called with the stats once the search ends.
+    """
+
+    def __init__(self, trace_memory=False, callback=None):
+        self.trace_memory = trace_memory
+        self.callback = callback
+        self.nodes_expanded = 0
+        self.frontier_peak = 0
+        self.neighbor_calls = 0
+        self.neighbor_time = 0.0
+        self.wall_time = 0.0
+        self.memory_peak = None
+        self.path_length = None
+        self.started = None
+        self.memory_base = 0
+        self.tracing = False
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __repr__(self):
+        counts = ", ".join(f"{key}={value}"
+                           for key, value in self.as_dict().items())
+        return f"SearchStats({counts})"
+
+    def start(self):
+        """Marks the start of the search."""
+        if self.trace_memory:
+            self.tracing = tracemalloc.is_tracing()
+            if not self.tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.memory_base = tracemalloc.get_traced_memory()[0]
+        self.started = time.perf_counter()
+
+    def finish(self, path):
+        """Marks the end of the search, which found path."""
+        self.wall_time += time.perf_counter() - self.started
+        self.path_length = None if path is None else len(path)
+        if self.trace_memory:
+            self.memory_peak = (tracemalloc.get_traced_memory()[1]
+                                - self.memory_base)
+            if not self.tracing:
+                tracemalloc.stop()
+        if self.callback is not None:
+            self.callback(self)
+
+    def expand(self, frontier_size):
+        """Records one expanded state with the frontier at frontier_size."""
+        self.nodes_expanded += 1
+        if frontier_size > self.frontier_peak:
+            self.frontier_peak = frontier_size
+
+    def timed(self, neighbors):
+        """Wraps a neighbours function to time every call."""
+        def neighbours(state):
+            started = time.perf_counter()
+            result = list(neighbors(state))
+            self.neighbor_time += time.perf_counter() - started
+            self.neighbor_calls += 1
+            return result
+        return neighbours
@@ -0,0 +1,220 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from array import array
+
+import degrees
+from graph import CompactGraph
+from landmarks import single_source_distances
+from loader import MemoryBudgetExceeded
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+
+class EditTest(unittest.TestCase):
+    """
+    Randomized check of editing loaded data: after every batch of edits
+    the co-stars must match a graph rebuilt from the credits, and the
+    landmark distances must match a fresh breadth-first search.
+    """
+
+    EDITS = 1500
+    CHECK_EVERY = 100
+
+    def load_compact(self):
+        degrees.names, degrees.people, degrees.movies = {}, {}, {}
+        degrees.load_data(DIRECTORY, compact=True)
+
+    def load_streaming(self):
+        degrees.load_streaming(DIRECTORY)
+
+    def load_snapshot(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        directory = shutil.copytree(DIRECTORY, os.path.join(directory, "data"))
+        self.load_compact()
+        expected = (dict(degrees.people), dict(degrees.movies), degrees.names)
+
+        # The first load writes the snapshot, the second reads it
+        for _ in range(2):
+            degrees.names, degrees.people, degrees.movies = {}, {}, {}
+            degrees.load_data(directory, use_snapshot=True)
+        self.assertNotIsInstance(degrees.people, dict)
+        self.assertEqual(
+            (dict(degrees.people), dict(degrees.movies), degrees.names),
+            expected
+        )
+
+    def test_compact(self):
+        self.load_compact()
+        self.edit(random.Random(0))
+
+    def test_streaming(self):
+        self.load_streaming()
+        self.edit(random.Random(1))
+
+    def test_snapshot(self):
+        self.load_snapshot()
+        self.edit(random.Random(2))
+
+    def test_landmarks_after_add_person(self):
+        self.load_compact()
+        degrees.add_person("p1", "Person 1", "1970")
+        degrees.add_credit("p1", "112384")
+        degrees.build_landmarks(len(degrees.people))
+        self.check({(person_id, movie_id)
+                    for movie_id in degrees.movies
+                    for person_id in self.stars(movie_id)},
+                   random.Random(3))
+
+    def test_name_search_after_add_person(self):
+        self.load_compact()
+        self.assertIsNone(degrees.name_index)
+        degrees.add_person("p1", "Persoon One", "1970")
+        with self.assertRaises(degrees.UnresolvedName) as raised:
+            degrees.resolve_name("Persoon Onf")
+        self.assertEqual([c["person_id"] for c in raised.exception.candidates],
+                         ["p1"])
+        degrees.add_person("p2", "Persoon Onf", "1971")
+        self.assertEqual(degrees.resolve_name("Persoon Onf"), "p2")
+        candidates = degrees.name_search().fuzzy("Persoon On")
+        self.assertEqual([c["person_id"] for c in candidates], ["p1", "p2"])
+
+    def edit(self, rng):
+        degrees.build_landmarks(3)
+        credits = {(person_id, movie_id)
+                   for movie_id in degrees.movies
+                   for person_id in self.stars(movie_id)}
+        removed_movies = []
+        for step in range(self.EDITS):
+            action = rng.random()
+            person_ids = list(degrees.people)
+            movie_ids = list(degrees.movies)
+            if action < 0.05:
+                person_id = f"p{step}"
+                degrees.add_person(person_id, f"Person {step}", "1970")
+            elif action < 0.1:
+                if removed_movies and rng.random() < 0.5:
+                    movie_id = removed_movies.pop()
+                else:
+                    movie_id = f"m{step}"
+                degrees.add_movie(movie_id, f"Movie {step}", "2000")
+            elif action < 0.11:
+                degrees.build_landmarks(3)
+                rebuilt = self.rebuild(credits)
+                degrees_of = sorted(map(rebuilt.degree, range(len(rebuilt))))
+                self.assertEqual(
+                    sorted(map(rebuilt.degree,
+                               degrees.landmark_index.landmarks)),
+                    degrees_of[-3:]
+                )
+            elif action < 0.13 and movie_ids:
+                movie_id = rng.choice(movie_ids)
+                degrees.remove_movie(movie_id)
+                credits = {credit for credit in credits
+                           if credit[1] != movie_id}
+                removed_movies.append(movie_id)
+            elif action < 0.6 and credits:
+                credit = rng.choice(sorted(credits))
+                degrees.remove_credit(*credit)
+                credits.discard(credit)
+            elif movie_ids:
+                credit = (rng.choice(person_ids), rng.choice(movie_ids))
+                degrees.add_credit(*credit)
+                credits.add(credit)
+            if step % self.CHECK_EVERY == 0:
+                self.check(credits, rng)
+        self.check(credits, rng)
+
+    def stars(self, movie_id):
+        graph = degrees.graph
+        return [graph.person_ids[person]
+                for person in graph.stars_of(graph.movie_index[movie_id])]
+
+    def rebuild(self, credits):
+        """Returns a graph built from scratch from the credits."""
+        graph = degrees.graph
+        credit_people = array("i")
+        credit_movies = array("i")
+        for person_id, movie_id in credits:
+            credit_people.append(graph.person_index[person_id])
+            credit_movies.append(graph.movie_index[movie_id])
+        return CompactGraph.from_credits(
+            list(graph.person_ids), list(graph.movie_ids),
+            credit_people, credit_movies
+        )
+
+    def check(self, credits, rng):
+        rebuilt = self.rebuild(credits)
+        for person_id in degrees.people:
+            person = rebuilt.person_index[person_id]
+            self.assertEqual(degrees.neighbors_for_person(person_id),
+                             set(rebuilt.to_ids(rebuilt.neighbors(person))))
+
+        index = degrees.landmark_index
+        for landmark, distances in zip(index.landmarks, index.distances):
+            self.assertEqual(distances,
+                             single_source_distances(rebuilt, landmark))
+
+        person_ids = list(degrees.people)
+        for _ in range(20):
+            source = rng.choice(person_ids)
+            target = rng.choice(person_ids)
+            path = degrees.shortest_path(source, target, "bfs")
+            expected = None if path is None else len(path)
+            self.assertEqual(degrees.degrees_of_separation(source, target),
+                             expected)
+            path = degrees.shortest_path(source, target, "astar")
+            self.assertEqual(None if path is None else len(path), expected)
+
+
+class ParallelTest(unittest.TestCase):
+    """Checks that pooled workers answer as the serial search does."""
+
+    def test_spawn(self):
+        degrees.names, degrees.people, degrees.movies = {}, {}, {}
+        degrees.load_data(DIRECTORY, compact=True)
+        degrees.build_landmarks(3)
+        rows = [["Kevin Bacon", "Tom Hanks"], ["Tom Cruise", "Emma Watson"],
+                ["Kevin Bacon", "Nobody At All"]]
+        expected = [degrees.answer_row(row, "astar") for row in rows]
+        self.assertEqual(
+            list(degrees.solve_parallel(rows, "astar", 2,
+                                        start_method="spawn")),
+            expected
+        )
+
+
+class BudgetTest(unittest.TestCase):
+    """Checks that a memory budget bounds streaming loads exactly."""
+
+    def test_budget(self):
+        report = degrees.load_streaming(DIRECTORY)
+        load_peak = report.peak
+        degrees.name_search()
+        peak = report.peak
+        self.assertGreater(peak, load_peak)
+
+        with self.assertRaises(MemoryBudgetExceeded):
+            degrees.load_streaming(DIRECTORY, load_peak - 1)
+
+        # Enough to load, but not for the name index: unknown names get
+        # no candidates, every time
+        report = degrees.load_streaming(DIRECTORY, load_peak)
+        held = report.bytes
+        for _ in range(2):
+            with self.assertRaises(degrees.UnresolvedName) as raised:
+                degrees.resolve_name("Nobody At All")
+            self.assertEqual(raised.exception.candidates, [])
+            self.assertEqual(report.bytes, held)
+        with self.assertRaises(MemoryBudgetExceeded):
+            degrees.name_search()
+
+        degrees.load_streaming(DIRECTORY, peak)
+        self.assertTrue(degrees.name_search().search("Kevin Bacon"))
+
+
+if __name__ == "__main__":
+    unittest.main()
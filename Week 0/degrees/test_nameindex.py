@@ -0,0 +1,107 @@
+import random
+import unittest
+
+from nameindex import NameIndex, edit_distance
+
+# A small alphabet, so random names are often within a few edits
+ALPHABET = "abc d"
+
+
+def levenshtein(a, b):
+    """Edit distance by the textbook dynamic program."""
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+def random_name(rng, longest=14):
+    return "".join(rng.choice(ALPHABET)
+                   for _ in range(rng.randint(0, longest)))
+
+
+class NameIndexTest(unittest.TestCase):
+    """Checks fuzzy search against comparing every name by brute force."""
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.people = {}
+        for i in range(600):
+            name = random_name(rng)
+            if rng.random() < 0.3:
+                name = name.upper()
+            self.people[str(i)] = {"name": name, "birth": str(1900 + i)}
+        self.weights = {person_id: rng.randrange(3)
+                        for person_id in self.people}
+        self.index = NameIndex(self.people, self.weights.get)
+        self.rng = rng
+
+    def test_edit_distance(self):
+        rng = random.Random(1)
+        for _ in range(3000):
+            a = random_name(rng, 20)
+            b = random_name(rng, 20)
+            distance = levenshtein(a, b)
+            for limit in range(4):
+                self.assertEqual(edit_distance(a, b, limit),
+                                 min(distance, limit + 1), (a, b, limit))
+
+    def test_filter(self):
+        for _ in range(200):
+            query = random_name(self.rng)
+            distances = [levenshtein(query, name) for name in self.index.names]
+            for max_edits in range(4):
+                found = set(self.index.filter(query, max_edits))
+                for i, distance in enumerate(distances):
+                    if distance <= max_edits:
+                        self.assertIn(i, found, (query, max_edits))
+
+    def test_fuzzy(self):
+        for _ in range(200):
+            query = random_name(self.rng)
+            distances = self.distances(query)
+            for max_edits in range(4):
+                for limit in (1, 5, 50):
+                    self.assertEqual(
+                        self.index.fuzzy(query, max_edits, limit),
+                        self.brute_force(distances, max_edits, limit),
+                        (query, max_edits, limit)
+                    )
+
+    def test_add(self):
+        for step in range(100):
+            person_id = f"new{step}"
+            self.people[person_id] = {"name": random_name(self.rng),
+                                      "birth": ""}
+            self.weights[person_id] = 0
+            self.index.add(person_id)
+            query = random_name(self.rng)
+            self.assertEqual(self.index.fuzzy(query, 2, 20),
+                             self.brute_force(self.distances(query), 2, 20),
+                             query)
+
+    def distances(self, query):
+        """Returns each person's edit distance from query."""
+        return {person_id: levenshtein(query, person["name"].lower())
+                for person_id, person in self.people.items()}
+
+    def brute_force(self, distances, max_edits, limit):
+        found = []
+        for person_id, distance in distances.items():
+            person = self.people[person_id]
+            if distance <= max_edits:
+                found.append({"person_id": person_id,
+                              "name": person["name"],
+                              "birth": person["birth"],
+                              "distance": distance})
+        found.sort(key=lambda c: (c["distance"], -self.weights[c["person_id"]],
+                                  c["name"], c["person_id"]))
+        return found[:limit]
+
+
+if __name__ == "__main__":
+    unittest.main()
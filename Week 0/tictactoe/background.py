@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import tictactoe as ttt
+
+
+class BackgroundPlayer():
+    """
+    Computes the AI's moves on a worker thread, so the game loop can
+    keep drawing while it thinks.
+
+    While the human is thinking it ponders: it solves the AI's reply to
+    each move the human might make, likeliest first, so the reply is
+    often ready the moment the human moves. Searches run one at a time
+    on a single thread, sharing tictactoe's transposition table, which
+    pondering also warms up.
+    """
+
+    def __init__(self, choose=ttt.minimax):
+        self.choose = choose
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        # Board key -> Future of the AI's move on that board
+        self.pondering = {}
+        self.pondered = None
+
+    def request(self, board):
+        """
+        Returns a Future of the AI's move on board, reusing the
+        pondered one if there is one. Other pondering is cancelled.
+        """
+        future = self.pondering.pop(board_key(board), None)
+        self.stop_pondering()
+        if future is None or future.cancelled():
+            future = self.executor.submit(self.choose, board)
+        return future
+
+    def ponder(self, board):
+        """
+        Starts solving the AI's reply to every human move on board,
+        unless that is already under way. The human is assumed to
+        prefer the center, then corners, then edges.
+        """
+        key = board_key(board)
+        if key == self.pondered:
+            return
+        self.stop_pondering()
+        self.pondered = key
+
+        available = ttt.actions(board)
+        for cell in ttt.PREFERRED_MOVES:
+            action = ttt.to_action(cell)
+            if action not in available:
+                continue
+            reply = ttt.result(board, action)
+            if not ttt.terminal(reply):
+                self.pondering[board_key(reply)] = self.executor.submit(
+                    self.choose, reply
+                )
+
+    def stop_pondering(self):
+        """Cancels pondering that has not started yet."""
+        for future in self.pondering.values():
+            future.cancel()
+        self.pondering.clear()
+        self.pondered = None
+
+    def shutdown(self):
+        """Stops the worker without waiting for pending searches."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def board_key(board):
+    """Returns a hashable copy of a board."""
+    return tuple(tuple(row) for row in board)
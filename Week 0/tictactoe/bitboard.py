@@ -0,0 +1,151 @@
+"""
+Tic Tac Toe positions as bitboards.
+
+A position is a pair of 9-bit ints (x, o): bit 3 * i + j of x is set
+when X has played cell (i, j), and likewise for o. Moves are cell
+indices 3 * i + j.
+"""
+
+FULL = 0b111111111
+
+# Every row, column and diagonal as a mask of its three cells
+WIN_MASKS = (
+    [0b111 << (3 * i) for i in range(3)]
+    + [0b001001001 << j for j in range(3)]
+    + [0b100010001, 0b001010100]
+)
+
+# WINNING[bits] tells whether the cells in bits complete any line
+WINNING = [any(bits & mask == mask for mask in WIN_MASKS)
+           for bits in range(FULL + 1)]
+
+# MOVES[occupied] lists the free cells when the cells in occupied are taken
+MOVES = [tuple(cell for cell in range(9) if not occupied >> cell & 1)
+         for occupied in range(FULL + 1)]
+
+
+def rotate(cell):
+    """Returns where cell goes when the board turns a quarter clockwise."""
+    i, j = divmod(cell, 3)
+    return 3 * j + 2 - i
+
+
+def reflect(cell):
+    """Returns where cell goes when the board is mirrored left to right."""
+    i, j = divmod(cell, 3)
+    return 3 * i + 2 - j
+
+
+def permute(bits, permutation):
+    """Moves each set bit c of bits to permutation[c]."""
+    permuted = 0
+    for cell in range(9):
+        if bits >> cell & 1:
+            permuted |= 1 << permutation[cell]
+    return permuted
+
+
+def symmetries():
+    """
+    Returns the 8 symmetries of the board (4 rotations, each optionally
+    mirrored) as cell permutations, the identity first.
+    """
+    permutations = []
+    for turns in range(4):
+        for mirrored in (False, True):
+            permutation = []
+            for cell in range(9):
+                for _ in range(turns):
+                    cell = rotate(cell)
+                permutation.append(reflect(cell) if mirrored else cell)
+            permutations.append(tuple(permutation))
+    return permutations
+
+
+# The symmetries, their inverses, and TRANSFORMS[s][bits], the cells in
+# bits moved by symmetry s
+SYMMETRIES = symmetries()
+INVERSES = [tuple(permutation.index(cell) for cell in range(9))
+            for permutation in SYMMETRIES]
+TRANSFORMS = [[permute(bits, permutation) for bits in range(FULL + 1)]
+              for permutation in SYMMETRIES]
+
+
+def x_to_move(x, o):
+    """Returns True if X has the next turn."""
+    return x.bit_count() == o.bit_count()
+
+
+def moves(x, o):
+    """Returns the free cells of the position."""
+    return MOVES[x | o]
+
+
+def play(x, o, cell):
+    """Returns the position after the player to move takes cell."""
+    if (x | o) >> cell & 1:
+        raise ValueError("invalid move")
+    if x_to_move(x, o):
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def utility(x, o):
+    """Returns 1 if X has won, -1 if O has won, 0 otherwise."""
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def terminal(x, o):
+    """Returns True if the game is over."""
+    return WINNING[x] or WINNING[o] or x | o == FULL
+
+
+def key(x, o):
+    """Returns a single int identifying the position."""
+    return x | o << 9
+
+
+def canonical(x, o):
+    """
+    Returns (x, o, symmetry): the representative of the position's
+    symmetry class (the image with the smallest key) and the index of
+    the symmetry mapping the position onto it.
+    """
+    best_x, best_o, best = x, o, 0
+    best_key = x | o << 9
+    for symmetry in range(1, 8):
+        transform = TRANSFORMS[symmetry]
+        tx = transform[x]
+        to = transform[o]
+        if tx | to << 9 < best_key:
+            best_x, best_o, best = tx, to, symmetry
+            best_key = tx | to << 9
+    return best_x, best_o, best
+
+
+def restore(symmetry, cell):
+    """
+    Returns the cell of the original position that symmetry moved to
+    cell, mapping a move on the canonical position back.
+    """
+    return INVERSES[symmetry][cell]
+
+
+def distinct_moves(x, o):
+    """
+    Returns the free cells of the position, leaving out any cell that a
+    symmetry of the position maps onto a smaller one, since playing it
+    leads to an equivalent position.
+    """
+    stabilizer = [SYMMETRIES[symmetry] for symmetry in range(1, 8)
+                  if TRANSFORMS[symmetry][x] == x
+                  and TRANSFORMS[symmetry][o] == o]
+    if not stabilizer:
+        return MOVES[x | o]
+    return tuple(cell for cell in MOVES[x | o]
+                 if all(permutation[cell] >= cell
+                        for permutation in stabilizer))
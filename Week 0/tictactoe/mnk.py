@@ -0,0 +1,339 @@
+"""
+m,n,k-game engine: an m x n board on which the first player to get k
+marks in a row (horizontally, vertically or diagonally) wins.
+Tic-tac-toe is the 3,3,3-game; 4,4,4 and 5,5,4 are larger variants.
+
+Boards use the same list-of-lists format as tictactoe.py. Searches run
+on bitboards (x, o), where bit n * i + j is set for cell (i, j), and
+deepen iteratively until the game is solved or the time budget ends,
+scoring positions at the cutoff with a heuristic evaluation.
+"""
+
+import math
+import time
+from collections import namedtuple
+
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Value of a won position. Heuristic evaluations stay below WIN.
+WIN = 1000000
+
+# What a search found: the best move (a cell index), its value for the
+# player to move, the depth completely searched, the positions visited
+# and whether the value is exact rather than heuristic
+Decision = namedtuple("Decision", ["move", "value", "depth", "nodes", "exact"])
+
+
+class OutOfTime(Exception):
+    """Raised inside a search when its time budget runs out."""
+
+
+class Clock():
+    """
+    Counts the positions one search visits and enforces its deadline.
+    Tracks whether the current iteration scored any position
+    heuristically.
+    """
+
+    # Positions visited between looks at the time
+    CHECK_EVERY = 256
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.nodes = 0
+        self.estimated = False
+
+    def tick(self):
+        self.nodes += 1
+        if (self.deadline is not None and self.nodes % self.CHECK_EVERY == 0
+                and time.perf_counter() > self.deadline):
+            raise OutOfTime
+
+
+class MNKGame():
+    """
+    Rules and search for the m,n,k-game on an m-row, n-column board.
+    """
+
+    def __init__(self, m, n, k, table_capacity=1000000):
+        if m < 1 or n < 1 or not 1 <= k <= max(m, n):
+            raise ValueError(f"no {k} in a row fits a {m}x{n} board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.cells = m * n
+        self.full = (1 << self.cells) - 1
+        self.lines = self.find_lines()
+
+        # Lines through each cell, to test a move for a win
+        self.lines_through = [[line for line in self.lines if line >> cell & 1]
+                              for cell in range(self.cells)]
+
+        # Cells nearest the centre first, as they lie on the most lines
+        middle = ((m - 1) / 2, (n - 1) / 2)
+        self.order = sorted(
+            range(self.cells),
+            key=lambda cell: (abs(cell // n - middle[0])
+                              + abs(cell % n - middle[1]), cell)
+        )
+
+        # Weight of a line holding count marks of only one player
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+
+        self.table = TranspositionTable(table_capacity)
+
+    def find_lines(self):
+        """Returns every run of k cells in a row as a mask."""
+        lines = {}
+        for i in range(self.m):
+            for j in range(self.n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    last_i = i + di * (self.k - 1)
+                    last_j = j + dj * (self.k - 1)
+                    if not (0 <= last_i < self.m and 0 <= last_j < self.n):
+                        continue
+                    mask = 0
+                    for step in range(self.k):
+                        mask |= 1 << ((i + di * step) * self.n + j + dj * step)
+                    lines[mask] = None
+        return list(lines)
+
+    # Boards
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def to_bitboard(self, board):
+        """
+        Returns the (x, o) bitboard of a board.
+        """
+        x = o = 0
+        for i in range(self.m):
+            for j in range(self.n):
+                if board[i][j] == X:
+                    x |= 1 << (self.n * i + j)
+                elif board[i][j] == O:
+                    o |= 1 << (self.n * i + j)
+        return x, o
+
+    def from_bitboard(self, x, o):
+        """
+        Returns the board of an (x, o) bitboard.
+        """
+        board = self.initial_state()
+        for i in range(self.m):
+            for j in range(self.n):
+                if x >> (self.n * i + j) & 1:
+                    board[i][j] = X
+                elif o >> (self.n * i + j) & 1:
+                    board[i][j] = O
+        return board
+
+    def to_action(self, cell):
+        """
+        Returns the action (i, j) for a cell index.
+        """
+        return divmod(cell, self.n)
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = self.to_bitboard(board)
+        return X if x.bit_count() == o.bit_count() else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        x, o = self.to_bitboard(board)
+        return {self.to_action(cell) for cell in self.moves(x | o)}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise ValueError("invalid move")
+        res = [row[:] for row in board]
+        res[i][j] = self.player(board)
+        return res
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = self.to_bitboard(board)
+        if self.wins(x):
+            return X
+        if self.wins(o):
+            return O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = self.to_bitboard(board)
+        return self.wins(x) or self.wins(o) or x | o == self.full
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        x, o = self.to_bitboard(board)
+        if self.wins(x):
+            return 1
+        if self.wins(o):
+            return -1
+        return 0
+
+    def best_move(self, board, time_limit=None, max_depth=None):
+        """
+        Returns the best action found for the current player on the
+        board within time_limit seconds and max_depth moves ahead,
+        or None if the game is over.
+        """
+        x, o = self.to_bitboard(board)
+        if self.wins(x) or self.wins(o) or x | o == self.full:
+            return None
+        if x.bit_count() == o.bit_count():
+            decision = self.search(x, o, time_limit, max_depth)
+        else:
+            decision = self.search(o, x, time_limit, max_depth)
+        return self.to_action(decision.move)
+
+    # Bitboards
+
+    def moves(self, occupied):
+        """Returns the free cells, nearest the centre first."""
+        return [cell for cell in self.order if not occupied >> cell & 1]
+
+    def wins(self, bits):
+        """Returns True if the cells in bits complete a line."""
+        return any(bits & line == line for line in self.lines)
+
+    def won_with(self, bits, cell):
+        """Returns True if the cells in bits complete a line through cell."""
+        return any(bits & line == line for line in self.lines_through[cell])
+
+    def evaluate(self, me, them):
+        """
+        Heuristic value of an unfinished position for the player owning
+        the cells in me: lines still open to them count against lines
+        still open to me, weighted by how full they are.
+        """
+        score = 0
+        weights = self.weights
+        for line in self.lines:
+            mine = me & line
+            theirs = them & line
+            if mine and not theirs:
+                score += weights[mine.bit_count()]
+            elif theirs and not mine:
+                score -= weights[theirs.bit_count()]
+        return max(-WIN + 1, min(WIN - 1, score))
+
+    def search(self, me, them, time_limit=None, max_depth=None):
+        """
+        Iterative deepening alpha-beta search for the player to move,
+        who owns the cells in me, in an unfinished position.
+
+        Searches one move ahead, then two, and so on until the value is
+        exact, max_depth is reached or time_limit seconds have passed.
+        Returns the Decision of the deepest search completed; the first
+        is always completed, however short the time limit.
+        """
+        started = time.perf_counter()
+        empty = self.cells - (me | them).bit_count()
+        limit = empty if max_depth is None else max(1, min(max_depth, empty))
+        clock = Clock(None)
+        decision = None
+        for depth in range(1, limit + 1):
+            clock.estimated = False
+            try:
+                value, move = self.negamax(me, them, depth, -WIN, WIN, clock)
+            except OutOfTime:
+                break
+            exact = not clock.estimated or abs(value) == WIN
+            decision = Decision(move, value, depth, clock.nodes, exact)
+            if exact:
+                break
+            if time_limit is not None:
+                clock.deadline = started + time_limit
+                if time.perf_counter() > clock.deadline:
+                    break
+        return decision._replace(nodes=clock.nodes)
+
+    def negamax(self, me, them, depth, alpha, beta, clock):
+        """
+        Returns [value, best move] for the player owning the cells in
+        me, looking depth moves ahead. Outside (alpha, beta) the value
+        is only a bound.
+        """
+        clock.tick()
+        key = me | them << self.cells
+        cached = self.table.get(key)
+        first = None
+        if cached is not None:
+            value, move, bound, searched = cached
+            if searched >= depth and (
+                    bound == EXACT
+                    or (bound == LOWER and value >= beta)
+                    or (bound == UPPER and value <= alpha)):
+                if searched != math.inf:
+                    clock.estimated = True
+                return [value, move]
+            first = move
+
+        occupied = me | them
+        moves = self.moves(occupied)
+        for cell in moves:
+            if self.won_with(me | 1 << cell, cell):
+                self.table.put(key, WIN, cell)
+                return [WIN, cell]
+        if first is not None:
+            moves.remove(first)
+            moves.insert(0, first)
+
+        window = alpha
+        estimated = clock.estimated
+        clock.estimated = False
+        v = -math.inf
+        best_move = None
+        for cell in moves:
+            mine = me | 1 << cell
+            if mine | them == self.full:
+                hypo = 0
+            elif depth == 1:
+                hypo = self.evaluate(mine, them)
+                clock.estimated = True
+            else:
+                hypo = -self.negamax(them, mine, depth - 1,
+                                     -beta, -alpha, clock)[0]
+            if hypo > v:
+                v = hypo
+                best_move = cell
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+
+        # Values never leave [-WIN, WIN], so a bound at either end is exact
+        if v <= window and v > -WIN:
+            bound = UPPER
+        elif v >= beta and v < WIN:
+            bound = LOWER
+        else:
+            bound = EXACT
+        searched = depth if clock.estimated else math.inf
+        clock.estimated = clock.estimated or estimated
+        self.table.put(key, v, best_move, bound, searched)
+        return [v, best_move]
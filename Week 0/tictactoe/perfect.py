@@ -0,0 +1,223 @@
+"""
+Perfect-play table for Tic Tac Toe.
+
+    python perfect.py [path]
+
+Solves every reachable position once and writes a table holding the
+value and best move of each, indexed by the position read as a base 3
+number. minimax(board) then answers from the table in constant time,
+without searching.
+
+Build the table ahead of time with this script, or call prepare() once
+at startup. Lookups only ever map an existing table.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import threading
+
+import bitboard
+import tictactoe as ttt
+
+# Bump VERSION whenever the entry layout below changes; tables written
+# by another version are ignored and rebuilt.
+MAGIC = b"TTTPLAY\0"
+VERSION = 1
+FILENAME = "tictactoe.table"
+
+# magic, version
+PREAMBLE = struct.Struct("<8sI")
+
+# One byte per position: the best move's cell in the low 4 bits
+# (NO_MOVE once the game is over) and the value + 1 in the next two.
+# Positions that cannot arise in a game are UNREACHABLE.
+SIZE = 3 ** 9
+NO_MOVE = 15
+UNREACHABLE = 0xFF
+
+# POWERS[bits] is the sum of 3 ** cell over the cells in bits, so the
+# index of position (x, o) is POWERS[x] + 2 * POWERS[o]
+POWERS = [sum(3 ** cell for cell in range(9) if bits >> cell & 1)
+          for bits in range(bitboard.FULL + 1)]
+
+# The table at the default path, loaded by the first lookup
+entries = None
+loading = threading.Lock()
+
+
+def table_path():
+    """Returns where the table lives by default, beside this module."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), FILENAME)
+
+
+def index(x, o):
+    """Returns the table index of a bitboard position."""
+    return POWERS[x] + 2 * POWERS[o]
+
+
+def build():
+    """
+    Solves every position reachable from the empty board.
+    Returns the table entries as a bytearray of SIZE bytes.
+    """
+    table = bytearray([UNREACHABLE]) * SIZE
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        position = index(x, o)
+        if table[position] != UNREACHABLE:
+            continue
+
+        if bitboard.terminal(x, o):
+            table[position] = (bitboard.utility(x, o) + 1) << 4 | NO_MOVE
+            continue
+
+        canonical_x, canonical_o, symmetry = bitboard.canonical(x, o)
+        if bitboard.x_to_move(x, o):
+            value, move = ttt.maxvalue(canonical_x, canonical_o)
+        else:
+            value, move = ttt.minvalue(canonical_x, canonical_o)
+        move = bitboard.restore(symmetry, move)
+        table[position] = (value + 1) << 4 | move
+
+        for cell in bitboard.moves(x, o):
+            stack.append(bitboard.play(x, o, cell))
+    return table
+
+
+def write_table(path, table):
+    """Writes table entries to path."""
+    # Write beside the target and swap it in, so readers never see
+    # a half-written table
+    temporary = f"{path}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION))
+            f.write(table)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def read_table(path):
+    """
+    Memory-maps the table at path.
+
+    Returns its entries as a read-only memoryview, or None if there is
+    no table or it was written by another version.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            return None
+
+    if len(data) != PREAMBLE.size + SIZE:
+        return None
+    magic, version = PREAMBLE.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return memoryview(data)[PREAMBLE.size:]
+
+
+def load(path=None):
+    """
+    Returns the table entries, memory-mapping the table at path (by
+    default table_path()) on first use.
+    Never searches: raises LookupError if there is no up-to-date table.
+    """
+    global entries
+    if entries is not None and path is None:
+        return entries
+
+    with loading:
+        if entries is not None and path is None:
+            return entries
+        path = path or table_path()
+        table = read_table(path)
+        if table is None:
+            raise LookupError(f"no perfect-play table at {path}; build it "
+                              f"with python perfect.py or prepare()")
+        if path == table_path():
+            entries = table
+        return table
+
+
+def prepare(path=None):
+    """
+    Loads the table at path (by default table_path()), building and
+    writing it first if it is missing or outdated, so that later
+    lookups never search. If it cannot be written, the built table is
+    kept in memory instead. Returns the table entries.
+    """
+    global entries
+    with loading:
+        path = path or table_path()
+        table = read_table(path)
+        if table is None:
+            built = build()
+            try:
+                write_table(path, built)
+            except OSError:
+                table = memoryview(bytes(built))
+            else:
+                table = read_table(path)
+        if path == table_path():
+            entries = table
+        return table
+
+
+def lookup(board):
+    """
+    Returns (value, action) for a board: its value with perfect play
+    (1 if X wins, -1 if O wins, 0 for a tie) and an optimal action,
+    None if the game is over.
+    Raises ValueError for boards that cannot arise in a game, and
+    LookupError if there is no table (see load()).
+    """
+    position = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == ttt.X:
+                position += 3 ** (3 * i + j)
+            elif board[i][j] == ttt.O:
+                position += 2 * 3 ** (3 * i + j)
+
+    entry = load()[position]
+    if entry == UNREACHABLE:
+        raise ValueError("board cannot arise in a game")
+    move = entry & 0xF
+    action = None if move == NO_MOVE else divmod(move, 3)
+    return (entry >> 4) - 1, action
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board,
+    like tictactoe.minimax, but answered from the table.
+    """
+    return lookup(board)[1]
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python perfect.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else table_path()
+    table = build()
+    write_table(path, table)
+    reachable = sum(entry != UNREACHABLE for entry in table)
+    print(f"Solved {reachable} positions into {path}")
+
+
+if __name__ == "__main__":
+    main()
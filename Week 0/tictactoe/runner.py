@@ -3,6 +3,7 @@ import sys
 import time
 
 import tictactoe as ttt
+from background import BackgroundPlayer
 
 pygame.init()
 size = width, height = 600, 400
@@ -17,14 +18,21 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Seconds the AI appears to think, even when its move is ready sooner
+ai_delay = 0.5
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai = BackgroundPlayer()
+ai_move = None
+ai_started = None
+clock = pygame.time.Clock()
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            ai.shutdown()
             sys.exit()
 
     screen.fill(black)
@@ -108,15 +116,18 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, computed in the background
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = ai.request(board)
+                ai_started = time.time()
+            elif ai_move.done() and time.time() - ai_started >= ai_delay:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
+
+        # Think ahead while the user does
+        if user == player and not game_over:
+            ai.ponder(board)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +152,8 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    ai.stop_pondering()
+                    ai_move = None
 
     pygame.display.flip()
+    clock.tick(60)
@@ -0,0 +1,147 @@
+"""
+Play Tic Tac Toe games between computer agents and measure throughput.
+
+    python simulate.py [--games N] [--x AGENT] [--o AGENT]
+                       [--workers N] [--cold] [--seed N]
+
+Agents: minimax, alphabeta (tictactoe.minimax in either mode), cached
+(perfect.minimax, answered from the precomputed table), deepening
+(the m,n,k engine's iterative deepening search) and random.
+
+Games are split across a process pool. Prints the results, games per
+second, positions searched per second and per-move latency percentiles
+for each agent. Positions searched are counted as transposition table
+probes. With --cold the tables are cleared before every move, so each
+move is searched from scratch.
+"""
+
+import argparse
+import multiprocessing
+import random
+import statistics
+import time
+
+import perfect
+import tictactoe as ttt
+
+AGENTS = ("minimax", "alphabeta", "cached", "deepening", "random")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--x", choices=AGENTS, default="alphabeta",
+                        help="agent playing X")
+    parser.add_argument("--o", choices=AGENTS, default="random",
+                        help="agent playing O")
+    parser.add_argument("--workers", type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the transposition tables before each move")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    initializer, initargs = None, ()
+    if "cached" in (args.x, args.o):
+        # Build the table once, not in every worker, and hand it to
+        # workers in case it could not be written for them to load
+        initializer, initargs = use_table, (bytes(perfect.prepare()),)
+
+    agents = {ttt.X: args.x, ttt.O: args.o}
+    jobs = [(agents, args.seed + game, args.cold)
+            for game in range(args.games)]
+
+    started = time.perf_counter()
+    if args.workers > 1:
+        with multiprocessing.Pool(args.workers, initializer,
+                                  initargs) as pool:
+            chunksize = max(1, len(jobs) // (4 * args.workers))
+            games = pool.map(play, jobs, chunksize)
+    else:
+        games = [play(job) for job in jobs]
+    elapsed = time.perf_counter() - started
+
+    report(agents, games, elapsed)
+
+
+def use_table(table):
+    """Installs the perfect-play table in a worker process."""
+    perfect.entries = table
+
+
+def play(job):
+    """
+    Plays one game. Returns (winner, moves), where moves lists
+    (player, seconds, positions searched) for every move.
+    """
+    agents, seed, cold = job
+    rng = random.Random(seed)
+    board = ttt.initial_state()
+    moves = []
+    while not ttt.terminal(board):
+        player = ttt.player(board)
+        if cold:
+            ttt.table.clear()
+            ttt.GAME.table.clear()
+        probes = searched()
+        started = time.perf_counter()
+        action = choose(agents[player], board, rng)
+        seconds = time.perf_counter() - started
+        moves.append((player, seconds, searched() - probes))
+        board = ttt.result(board, action)
+    return ttt.winner(board), moves
+
+
+def choose(agent, board, rng):
+    """Returns agent's action on board."""
+    if agent == "minimax":
+        return ttt.minimax(board, "minimax")
+    if agent == "alphabeta":
+        return ttt.minimax(board, "alphabeta")
+    if agent == "cached":
+        return perfect.minimax(board)
+    if agent == "deepening":
+        return ttt.GAME.best_move(board)
+    return rng.choice(sorted(ttt.actions(board)))
+
+
+def searched():
+    """Returns how many transposition table probes have been made."""
+    total = 0
+    for table in (ttt.table, ttt.GAME.table):
+        total += table.hits + table.misses
+    return total
+
+
+def report(agents, games, elapsed):
+    """Prints the results and per-agent costs."""
+    winners = [winner for winner, _ in games]
+    print(f"{len(games)} games in {elapsed:.2f}s "
+          f"({len(games) / elapsed:.0f} games/s): "
+          f"X ({agents[ttt.X]}) won {winners.count(ttt.X)}, "
+          f"O ({agents[ttt.O]}) won {winners.count(ttt.O)}, "
+          f"{winners.count(None)} drawn")
+
+    print(f"{'player':6} {'agent':10} {'moves':>7} {'nodes/s':>10} "
+          f"{'p50 us':>8} {'p95 us':>8} {'p99 us':>8} {'max us':>8}")
+    for player in (ttt.X, ttt.O):
+        moves = [(seconds, nodes)
+                 for _, made in games
+                 for mover, seconds, nodes in made if mover == player]
+        if not moves:
+            continue
+        latencies = sorted(seconds * 1e6 for seconds, _ in moves)
+        if len(latencies) > 1:
+            percentiles = statistics.quantiles(latencies, n=100)
+            p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+        else:
+            p50 = p95 = p99 = latencies[0]
+        seconds = sum(seconds for seconds, _ in moves)
+        nodes = sum(nodes for _, nodes in moves)
+        print(f"{player:6} {agents[player]:10} {len(moves):7} "
+              f"{nodes / seconds if seconds else 0:10.0f} "
+              f"{p50:8.1f} {p95:8.1f} {p99:8.1f} {latencies[-1]:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
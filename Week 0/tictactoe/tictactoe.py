@@ -4,143 +4,259 @@ Tic Tac Toe Player
 
 import math
 
-X = "X"
-O = "O"
-EMPTY = None
+import bitboard
+from mnk import MNKGame, X, O, EMPTY
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# The board rules are those of the general m,n,k-game engine. minimax()
+# below is an exact solver specialised to 3x3 boards.
+GAME = MNKGame(3, 3, 3)
+
+# Search algorithms minimax() can use
+MODES = {"minimax", "alphabeta"}
+
+# Static move ordering for alpha-beta: center, corners, then edges, as
+# the center and corners take part in the most winning lines
+# (as bitboard cell indices)
+PREFERRED_MOVES = [4,
+                   0, 2, 6, 8,
+                   1, 3, 5, 7]
+
+# Shared by every search, so positions solved in one game are reused in
+# the next. Keyed by bitboard.key(x, o) of the canonical position of
+# each symmetry class.
+table = TranspositionTable()
+
+# Killer moves: for each number of moves played, the last two moves
+# that caused an alpha-beta cutoff, tried early in sibling positions
+killers = {}
 
 
 def initial_state():
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return GAME.initial_state()
 
 
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    x = sum(row.count(X) for row in board)
-    o = sum(row.count(O) for row in board)
+    return GAME.player(board)
 
-    if x == o:
-        return X
-    else:
-        return O
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    solution = set()
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == EMPTY:
-                solution.add((i,j))
-    
-    return solution
+    return GAME.actions(board)
+
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    res = [row[:] for row in board]
-    p = player(board)
-    if board[action[0]][action[1]] != EMPTY:
-        raise Exception("invalid move")
-    else:
-        res[action[0]][action[1]] = p
-        return res
-
-def columns(board):
-    col = []
-    for i in range(3):
-            col.append([board[0][i], board[1][i], board[2][i]])
-    
-    return col
+    return GAME.result(board, action)
 
-def diagonal(board):
-    return [[board[0][0], board[1][1], board[2][2]],[board[0][2], board[1][1], board[2][0]]]
-    
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    x = [X, X, X]
-    o = [O, O, O]
+    return GAME.winner(board)
 
-    if x in board or x in columns(board) or x in diagonal(board):
-        return X
-    elif o in board or o in columns(board) or o in diagonal(board):
-        return O
-    else:
-        return None
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) is not None:
-        return True
-    else:
-        for i in range(3):
-            for j in range(3):
-                if board[i][j] == EMPTY:
-                    return False    
-        return True
+    return GAME.terminal(board)
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
+    return GAME.utility(board)
+
+
+def to_bitboard(board):
+    """
+    Returns the (x, o) bitboard of a board, for use with the bitboard
+    module.
+    """
+    return GAME.to_bitboard(board)
+
+
+def from_bitboard(x, o):
+    """
+    Returns the board of an (x, o) bitboard.
+    """
+    return GAME.from_bitboard(x, o)
 
 
-def minimax(board):
+def to_action(cell):
+    """
+    Returns the action (i, j) for a bitboard cell index.
+    """
+    return GAME.to_action(cell)
+
+
+def minimax(board, mode="minimax"):
     """
     Returns the optimal action for the current player on the board.
+
+    mode selects the search: "minimax" explores every move, while
+    "alphabeta" prunes moves that cannot change the result. Both return
+    an optimal move, though not necessarily the same one when several
+    moves are equally good.
+
+    The search runs on the canonical bitboard of the board's symmetry
+    class, and its move is mapped back onto the board.
     """
-    mp = {}
-    if terminal(board) == True:
+    if mode not in MODES:
+        raise ValueError(f"unknown mode {mode!r}")
+    x, o, symmetry = bitboard.canonical(*to_bitboard(board))
+    if bitboard.terminal(x, o):
         return None
 
-    if player(board) == X:
-        return maxvalue(board)[1]
+    if mode == "alphabeta":
+        move = alphabeta(x, o, -1, 1)[1]
+    elif bitboard.x_to_move(x, o):
+        move = maxvalue(x, o)[1]
     else:
-        return minvalue(board)[1]
+        move = minvalue(x, o)[1]
+    return to_action(bitboard.restore(symmetry, move))
+
+
+def maxvalue(x, o):
+    """
+    Returns [value, best move] for a bitboard position with X to move.
+    The move is on the canonical form of the position.
+    """
+    x, o, _ = bitboard.canonical(x, o)
+    key = bitboard.key(x, o)
+    cached = table.get(key)
+    if cached is not None and cached[2] == EXACT:
+        return cached[:2]
 
-    
-def maxvalue(board):
     v = -math.inf
     best_move = None
-    if terminal(board) == True:
-        return [utility(board), None]
+    if bitboard.terminal(x, o):
+        v = bitboard.utility(x, o)
     else:
-        for action in actions(board):
-            hypo = minvalue(result(board, action))[0]
+        for cell in bitboard.distinct_moves(x, o):
+            hypo = minvalue(x | 1 << cell, o)[0]
             if hypo > v:
                 v = hypo
-                best_move = action
+                best_move = cell
+    table.put(key, v, best_move)
     return [v, best_move]
 
-def minvalue(board):
+
+def minvalue(x, o):
+    """
+    Returns [value, best move] for a bitboard position with O to move.
+    The move is on the canonical form of the position.
+    """
+    x, o, _ = bitboard.canonical(x, o)
+    key = bitboard.key(x, o)
+    cached = table.get(key)
+    if cached is not None and cached[2] == EXACT:
+        return cached[:2]
+
     v = math.inf
     best_move = None
-    if terminal(board) == True:
-        return [utility(board), None]
+    if bitboard.terminal(x, o):
+        v = bitboard.utility(x, o)
     else:
-        for action in actions(board):
-            hypo = maxvalue(result(board, action))[0]
+        for cell in bitboard.distinct_moves(x, o):
+            hypo = maxvalue(x, o | 1 << cell)[0]
+            if hypo < v:
+                v = hypo
+                best_move = cell
+    table.put(key, v, best_move)
+    return [v, best_move]
+
+
+def alphabeta(x, o, alpha, beta):
+    """
+    Returns [value, best move] for a bitboard position, searching only
+    as far as needed to tell whether the value lies within
+    (alpha, beta). Outside that window the value returned is only a
+    bound. The move is on the canonical form of the position.
+
+    Moves are tried in order: the best move stored for the position,
+    the killer moves for its depth, then PREFERRED_MOVES.
+    """
+    x, o, _ = bitboard.canonical(x, o)
+    key = bitboard.key(x, o)
+    cached = table.get(key)
+    first = None
+    if cached is not None:
+        v, move, bound, _ = cached
+        if (bound == EXACT
+                or (bound == LOWER and v >= beta)
+                or (bound == UPPER and v <= alpha)):
+            return [v, move]
+        first = move
+
+    if bitboard.terminal(x, o):
+        v = bitboard.utility(x, o)
+        table.put(key, v, None)
+        return [v, None]
+
+    maximizing = bitboard.x_to_move(x, o)
+    window = (alpha, beta)
+    available = bitboard.distinct_moves(x, o)
+    played = (x | o).bit_count()
+    v = -math.inf if maximizing else math.inf
+    best_move = None
+    for cell in ordered_moves(available, first, killers.get(played, [])):
+        if maximizing:
+            hypo = alphabeta(x | 1 << cell, o, alpha, beta)[0]
+            if hypo > v:
+                v = hypo
+                best_move = cell
+            alpha = max(alpha, v)
+        else:
+            hypo = alphabeta(x, o | 1 << cell, alpha, beta)[0]
             if hypo < v:
                 v = hypo
-                best_move = action
+                best_move = cell
+            beta = min(beta, v)
+        if alpha >= beta:
+            remember_killer(played, cell)
+            break
+
+    # Values never leave [-1, 1], so a bound at either end is exact
+    if v <= window[0] and v > -1:
+        bound = UPPER
+    elif v >= window[1] and v < 1:
+        bound = LOWER
+    else:
+        bound = EXACT
+    table.put(key, v, best_move, bound)
     return [v, best_move]
+
+
+def ordered_moves(available, first, killer_moves):
+    """
+    Returns the available cells, most promising first: first, then
+    killer_moves, then the rest in PREFERRED_MOVES order.
+    """
+    ordered = []
+    for cell in [first] + killer_moves + PREFERRED_MOVES:
+        if cell in available and cell not in ordered:
+            ordered.append(cell)
+    return ordered
+
+
+def remember_killer(played, cell):
+    """Records a move that caused a cutoff after played moves."""
+    moves = killers.setdefault(played, [])
+    if cell in moves:
+        return
+    moves.insert(0, cell)
+    del moves[2:]
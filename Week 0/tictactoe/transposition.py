@@ -0,0 +1,50 @@
+import math
+from collections import OrderedDict
+
+# Whether a stored value is exact, or only a lower or upper bound on the
+# value (alpha-beta stores bounds when the search was cut off)
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+
+class TranspositionTable():
+    """
+    Size-bounded cache of searched positions, keyed by an int encoding
+    of each position.
+    Each entry holds the value, best move and bound (EXACT, LOWER or
+    UPPER) of the position, and the depth it was searched to (math.inf
+    when searched to the end of the game).
+    Once capacity entries are stored, the least recently used one is
+    evicted to make room.
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Returns the [value, move, bound, depth] stored for key, or None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value, move, bound=EXACT, depth=math.inf):
+        self.entries[key] = [value, move, bound, depth]
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -1,7 +1,83 @@
 import itertools
+import weakref
+
+import sat
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Entailment engines model_check can use
+ENGINES = {"enumerate", "sat", "truthtable"}
+
+# Most symbols the "truthtable" engine takes on: its columns hold a bit
+# for every model, 4 MiB each at 25 symbols
+TRUTH_TABLE_SYMBOLS = 25
+
+# Ways Sentence.to_cnf can convert sentences
+CNF_METHODS = {"tseitin", "distribute"}
+
+# Hash-consed sentences of each class, by the identities of their parts
+INSTANCES = {}
 
 
 class Sentence():
+    """
+    Base class of logical sentences.
+
+    Sentences are hash-consed: constructing a sentence structurally
+    identical to one that exists (from the same symbols and
+    subsentences) returns the existing object, so repeated subformulas
+    form a shared DAG. Their hashes and symbol sets are computed once.
+
+    And() itself returns a new conjunction, as add() changes it in place
+    to build up a knowledge base. Used inside another sentence, a
+    conjunction is replaced by its shared, unchangeable copy, so adding
+    to it afterwards does not change sentences built from it.
+    """
+
+    __slots__ = ("hash_value", "symbol_set", "__weakref__")
+
+    def __new__(cls, *args):
+        sentence = super().__new__(cls)
+        sentence.hash_value = None
+        sentence.symbol_set = None
+        return sentence
+
+    @classmethod
+    def interned(cls, key, *parts):
+        """
+        Returns the existing sentence of class cls with key, or a new
+        one built from parts (its subsentences, or a symbol name).
+        """
+        instances = INSTANCES.setdefault(cls, weakref.WeakValueDictionary())
+        sentence = instances.get(key)
+        if sentence is None:
+            sentence = Sentence.__new__(cls)
+            sentence.build(*parts)
+            instances[key] = sentence
+        return sentence
+
+    def build(self, *parts):
+        """Sets up a new sentence from its parts."""
+        raise NotImplementedError
+
+    def __hash__(self):
+        if self.hash_value is None:
+            self.hash_value = hash(self.structure())
+        return self.hash_value
+
+    def __reduce__(self):
+        return (type(self), self.arguments())
+
+    def structure(self):
+        """Returns the tuple the sentence's hash is computed from."""
+        return ()
+
+    def arguments(self):
+        """Returns the arguments that construct the sentence."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,13 +89,51 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
+        if self.symbol_set is None:
+            self.symbol_set = frozenset(self.find_symbols())
+        return set(self.symbol_set)
+
+    def find_symbols(self):
+        """Returns a new set of all symbols in the logical sentence."""
         return set()
 
+    def compile(self, symbols):
+        """
+        Returns a function evaluating the sentence in a model given as
+        an int, where bit i holds the value of the symbol named
+        symbols[i]. Much faster than evaluate() for checking many models.
+        """
+        index = {name: i for i, name in enumerate(symbols)}
+        return compile_sentence(self, index)
+
+    def to_cnf(self, method="tseitin"):
+        """
+        Returns a CNF holding clauses that require the sentence to be
+        true. method "tseitin" gives clauses linear in the size of the
+        sentence, using extra variables; "distribute" uses only the
+        sentence's symbols, but can grow exponentially.
+        """
+        cnf = CNF()
+        cnf.add(self, method)
+        return cnf
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    @classmethod
+    def shared(cls, sentence):
+        """
+        Validates a subsentence and returns its shared form: the
+        interned copy of a conjunction, otherwise the sentence itself.
+        """
+        Sentence.validate(sentence)
+        if isinstance(sentence, And) and not sentence.frozen:
+            key = tuple(id(conjunct) for conjunct in sentence.conjuncts)
+            return And.interned(key, *sentence.conjuncts)
+        return sentence
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -44,11 +158,18 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        return cls.interned(name, name)
+
+    def build(self, name):
         self.name = name
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
         return hash(("symbol", self.name))
@@ -56,6 +177,9 @@ class Symbol(Sentence):
     def __repr__(self):
         return self.name
 
+    def arguments(self):
+        return (self.name,)
+
     def evaluate(self, model):
         try:
             return bool(model[self.name])
@@ -65,47 +189,67 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
+    def find_symbols(self):
         return {self.name}
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
+
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
+        operand = Sentence.shared(operand)
+        return cls.interned(id(operand), operand)
+
+    def build(self, operand):
         self.operand = operand
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return Sentence.__hash__(self)
 
     def __repr__(self):
         return f"Not({self.operand})"
 
+    def structure(self):
+        return ("not", hash(self.operand))
+
+    def arguments(self):
+        return (self.operand,)
+
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
+    def find_symbols(self):
         return self.operand.symbols()
 
 
 class And(Sentence):
+
+    __slots__ = ("conjuncts", "frozen")
+
     def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
+        self.conjuncts = [Sentence.shared(conjunct) for conjunct in conjuncts]
+        self.frozen = False
+
+    def build(self, *conjuncts):
         self.conjuncts = list(conjuncts)
+        self.frozen = True
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return Sentence.__hash__(self)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -113,9 +257,18 @@ class And(Sentence):
         )
         return f"And({conjunctions})"
 
+    def structure(self):
+        return ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+
+    def arguments(self):
+        return tuple(self.conjuncts)
+
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        if self.frozen:
+            raise TypeError("conjunctions inside sentences cannot be changed")
+        self.conjuncts.append(Sentence.shared(conjunct))
+        self.hash_value = None
+        self.symbol_set = None
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,28 +279,40 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
+    def find_symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
+
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
+        disjuncts = [Sentence.shared(disjunct) for disjunct in disjuncts]
+        key = tuple(id(disjunct) for disjunct in disjuncts)
+        return cls.interned(key, *disjuncts)
+
+    def build(self, *disjuncts):
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return Sentence.__hash__(self)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
 
+    def structure(self):
+        return ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+
+    def arguments(self):
+        return tuple(self.disjuncts)
+
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
@@ -157,28 +322,43 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
+    def find_symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
+
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
+        antecedent = Sentence.shared(antecedent)
+        consequent = Sentence.shared(consequent)
+        key = (id(antecedent), id(consequent))
+        return cls.interned(key, antecedent, consequent)
+
+    def build(self, antecedent, consequent):
         self.antecedent = antecedent
         self.consequent = consequent
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return Sentence.__hash__(self)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
 
+    def structure(self):
+        return ("implies", hash(self.antecedent), hash(self.consequent))
+
+    def arguments(self):
+        return (self.antecedent, self.consequent)
+
     def evaluate(self, model):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
@@ -188,76 +368,461 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
+    def find_symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
+
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
+        left = Sentence.shared(left)
+        right = Sentence.shared(right)
+        return cls.interned((id(left), id(right)), left, right)
+
+    def build(self, left, right):
         self.left = left
         self.right = right
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return Sentence.__hash__(self)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
+    def structure(self):
+        return ("biconditional", hash(self.left), hash(self.right))
+
+    def arguments(self):
+        return (self.left, self.right)
+
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
+    def find_symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+class CNF():
+    """
+    Sentences in conjunctive normal form, as a list of clauses of
+    integer literals: variable v is the literal v, its negation -v.
+
+    Symbols are numbered from 1 as they are first seen. Sentences are
+    added either by the Tseitin encoding, where compound sentences
+    inside clauses are replaced by fresh variables defined to be
+    equivalent to them, or by distributing ∨ over ∧ after pushing
+    negations inwards.
+
+    Both conversions cache their result for each subformula, keyed by
+    the sentences' structural equality, so a subformula repeated
+    throughout a knowledge base is converted once.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.count = 0
+        self.variables = {}
+        self.names = {}
+
+        # Tseitin: sentence -> equivalent literal
+        self.definitions = {}
+
+        # Distribution: (sentence, negated) -> clauses
+        self.expansions = {}
+
+    def variable(self, name):
+        """Returns the variable for a symbol name."""
+        if name not in self.variables:
+            self.count += 1
+            self.variables[name] = self.count
+            self.names[self.count] = name
+        return self.variables[name]
+
+    def fresh(self):
+        """Returns a new variable standing for no symbol."""
+        self.count += 1
+        return self.count
+
+    def add(self, sentence, method="tseitin"):
+        """Adds clauses requiring sentence to be true."""
+        if method not in CNF_METHODS:
+            raise ValueError(f"unknown method {method!r}")
+        if method == "distribute":
+            self.clauses.extend(self.expand(sentence, False))
+        elif isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        elif isinstance(sentence, Not) and isinstance(sentence.operand, Not):
+            self.add(sentence.operand.operand)
+        elif isinstance(sentence, Not) and isinstance(sentence.operand, Or):
+            for disjunct in sentence.operand.disjuncts:
+                self.add(Not(disjunct))
+        elif (isinstance(sentence, Not)
+              and isinstance(sentence.operand, Implication)):
+            self.add(sentence.operand.antecedent)
+            self.add(Not(sentence.operand.consequent))
         else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to sentence, adding the clauses
+        that define it the first time a compound sentence is seen.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        gate = self.fresh()
+        if isinstance(sentence, And):
+            # gate <=> c1 ∧ c2 ∧ ...
+            literals = [self.literal(c) for c in sentence.conjuncts]
+            for literal in literals:
+                self.clauses.append([-gate, literal])
+            self.clauses.append([gate] + [-literal for literal in literals])
+        elif isinstance(sentence, Or):
+            # gate <=> d1 ∨ d2 ∨ ...
+            literals = [self.literal(d) for d in sentence.disjuncts]
+            for literal in literals:
+                self.clauses.append([gate, -literal])
+            self.clauses.append([-gate] + literals)
+        elif isinstance(sentence, Implication):
+            # gate <=> ¬a ∨ b
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            self.clauses.extend([[-gate, -a, b], [gate, a], [gate, -b]])
+        elif isinstance(sentence, Biconditional):
+            # gate <=> (a <=> b)
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            self.clauses.extend([[-gate, -a, b], [-gate, a, -b],
+                                 [gate, a, b], [gate, -a, -b]])
+        else:
+            raise TypeError(f"cannot convert {sentence!r} to CNF")
+        self.definitions[sentence] = gate
+        return gate
+
+    def expand(self, sentence, negated):
+        """
+        Returns clauses over symbol variables only that are equivalent
+        to sentence, or to its negation if negated.
+        """
+        key = (sentence, negated)
+        if key in self.expansions:
+            return self.expansions[key]
+
+        if isinstance(sentence, Symbol):
+            variable = self.variable(sentence.name)
+            clauses = [[-variable if negated else variable]]
+        elif isinstance(sentence, Not):
+            clauses = self.expand(sentence.operand, not negated)
+        elif isinstance(sentence, (And, Or)):
+            parts = [self.expand(part, negated) for part in (
+                sentence.conjuncts if isinstance(sentence, And)
+                else sentence.disjuncts
+            )]
+            if isinstance(sentence, And) != negated:
+                clauses = conjoin(parts)
+            else:
+                clauses = disjoin(parts)
+        elif isinstance(sentence, Implication):
+            if negated:
+                # a ∧ ¬b
+                clauses = conjoin([self.expand(sentence.antecedent, False),
+                                   self.expand(sentence.consequent, True)])
+            else:
+                # ¬a ∨ b
+                clauses = disjoin([self.expand(sentence.antecedent, True),
+                                   self.expand(sentence.consequent, False)])
+        elif isinstance(sentence, Biconditional):
+            # (¬a ∨ b) ∧ (a ∨ ¬b), or (a ∨ b) ∧ (¬a ∨ ¬b) when negated
+            left = sentence.left
+            right = sentence.right
+            clauses = conjoin([
+                disjoin([self.expand(left, not negated),
+                         self.expand(right, False)]),
+                disjoin([self.expand(left, negated),
+                         self.expand(right, True)]),
+            ])
+        else:
+            raise TypeError(f"cannot convert {sentence!r} to CNF")
+
+        self.expansions[key] = clauses
+        return clauses
+
+    def dimacs(self):
+        """Returns the clauses in DIMACS CNF format."""
+        lines = [f"c {variable} {name}"
+                 for variable, name in self.names.items()]
+        lines.append(f"p cnf {self.count} {len(self.clauses)}")
+        for clause in self.clauses:
+            lines.append(" ".join(str(literal) for literal in clause) + " 0")
+        return "\n".join(lines) + "\n"
+
+    def solve(self):
+        """
+        Returns a model (symbol name -> bool) satisfying the clauses,
+        or None if they are unsatisfiable.
+        """
+        values = sat.solve(self.clauses, self.count)
+        if values is None:
+            return None
+        return {name: values[variable]
+                for name, variable in self.variables.items()}
+
+
+def conjoin(parts):
+    """Returns the clauses of a conjunction of clause lists."""
+    return [clause for part in parts for clause in part]
+
+
+def disjoin(parts):
+    """
+    Returns the clauses of a disjunction of clause lists: one clause
+    for every way of picking a clause from each part. Clauses that are
+    always true are dropped.
+    """
+    clauses = [[]]
+    for part in parts:
+        combined = []
+        for clause in clauses:
+            for other in part:
+                merged = list(dict.fromkeys(clause + other))
+                if not any(-literal in merged for literal in merged):
+                    combined.append(merged)
+        clauses = combined
+    return clauses
+
+
+# Nesting beyond this many operators is split into separate functions,
+# keeping generated code within the parser's limits
+COMPILE_DEPTH = 32
+
+
+def compile_sentence(sentence, index):
+    """
+    Generates Python code evaluating sentence over an int model, with
+    symbol name's value at bit index[name], and returns it as a function.
+    """
+    helpers = {}
+
+    def expression(sentence, depth):
+        if depth > COMPILE_DEPTH:
+            name = f"helper{len(helpers)}"
+            helpers[name] = compile_sentence(sentence, index)
+            return f"{name}(m)"
+        depth += 1
+
+        if isinstance(sentence, Symbol):
+            if sentence.name not in index:
+                raise Exception(f"variable {sentence.name} not in model")
+            return f"(m >> {index[sentence.name]} & 1)"
+        if isinstance(sentence, Not):
+            return f"(not {expression(sentence.operand, depth)})"
+        if isinstance(sentence, And):
+            if not sentence.conjuncts:
+                return "True"
+            return "(" + " and ".join(expression(conjunct, depth)
+                                      for conjunct in sentence.conjuncts) + ")"
+        if isinstance(sentence, Or):
+            if not sentence.disjuncts:
+                return "False"
+            return "(" + " or ".join(expression(disjunct, depth)
+                                     for disjunct in sentence.disjuncts) + ")"
+        if isinstance(sentence, Implication):
+            antecedent = expression(sentence.antecedent, depth)
+            consequent = expression(sentence.consequent, depth)
+            return f"(not {antecedent} or {consequent})"
+        if isinstance(sentence, Biconditional):
+            left = expression(sentence.left, depth)
+            right = expression(sentence.right, depth)
+            return f"((not {left}) == (not {right}))"
+        raise TypeError(f"cannot compile {sentence!r}")
+
+    code = f"lambda m: bool({expression(sentence, 0)})"
+    return eval(code, helpers)
+
+
+class TruthTable():
+    """
+    Truth table over symbols with one column per sentence: bit m of the
+    column is the sentence's value in model m, where bit i of m holds
+    the value of symbols[i].
+
+    Columns are packed bitsets, combined by bitwise operations that
+    evaluate a sentence in every model at once. They are numpy arrays
+    of 64-bit words when numpy is installed, and Python ints otherwise.
+
+    A column takes 2 ** len(symbols) bits: 4 MiB at 25 symbols. While a
+    sentence is tabulated, the column of a subformula used more than
+    once is kept until its last use, so that it is computed only once;
+    other columns are dropped as soon as they are combined. At most a
+    few columns per level of nesting are held, plus those of shared
+    subformulas still to be used.
+    """
+
+    def __init__(self, symbols):
+        if len(symbols) > TRUTH_TABLE_SYMBOLS:
+            raise ValueError(f"too many symbols for a truth table "
+                             f"({len(symbols)} > {TRUTH_TABLE_SYMBOLS})")
+        self.index = {name: i for i, name in enumerate(symbols)}
+        self.models = 1 << len(symbols)
+        if numpy is not None:
+            self.words = max(1, self.models // 64)
+            self.full = numpy.uint64((1 << min(self.models, 64)) - 1)
+            self.none = numpy.zeros(self.words, dtype=numpy.uint64)
+        else:
+            self.full = (1 << self.models) - 1
+            self.none = 0
+
+    def column(self, sentence):
+        """Returns the column of sentence."""
+        uses = {}
+        self.count_uses(sentence, uses)
+        return self.tabulate(sentence, uses, {})
+
+    def count_uses(self, sentence, uses):
+        """
+        Counts in uses how many times each subformula of sentence is an
+        operand of another.
+        """
+        if isinstance(sentence, Symbol):
+            return
+        for operand in sentence.arguments():
+            uses[operand] = uses.get(operand, 0) + 1
+            if uses[operand] == 1:
+                self.count_uses(operand, uses)
+
+    def tabulate(self, sentence, uses, columns):
+        """
+        Returns the column of sentence, keeping those of subformulas
+        with uses left in columns.
+        """
+        if sentence in columns:
+            column = columns[sentence]
+            uses[sentence] -= 1
+            if not uses[sentence]:
+                del columns[sentence]
+            return column
+
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.index:
+                raise Exception(f"variable {sentence.name} not in model")
+            column = self.symbol_column(self.index[sentence.name])
+        elif isinstance(sentence, Not):
+            column = self.full ^ self.tabulate(sentence.operand, uses, columns)
+        elif isinstance(sentence, And):
+            column = self.full
+            for conjunct in sentence.conjuncts:
+                column = column & self.tabulate(conjunct, uses, columns)
+        elif isinstance(sentence, Or):
+            column = self.none
+            for disjunct in sentence.disjuncts:
+                column = column | self.tabulate(disjunct, uses, columns)
+        elif isinstance(sentence, Implication):
+            column = ((self.full
+                       ^ self.tabulate(sentence.antecedent, uses, columns))
+                      | self.tabulate(sentence.consequent, uses, columns))
+        elif isinstance(sentence, Biconditional):
+            column = self.full ^ (self.tabulate(sentence.left, uses, columns)
+                                  ^ self.tabulate(sentence.right, uses,
+                                                  columns))
+        else:
+            raise TypeError(f"cannot tabulate {sentence!r}")
+
+        # Symbol columns are cheap enough to build again
+        if uses.get(sentence, 0) > 1 and not isinstance(sentence, Symbol):
+            columns[sentence] = column
+            uses[sentence] -= 1
+        return column
+
+    def symbol_column(self, i):
+        """
+        Returns the column of symbol i: runs of 2 ** i false models
+        alternating with 2 ** i true ones.
+        """
+        if numpy is not None:
+            if i < 6:
+                word = sum(1 << bit for bit in range(64) if bit >> i & 1)
+                return numpy.full(self.words, word, dtype=numpy.uint64)
+            true = (numpy.arange(self.words) >> (i - 6)) & 1
+            return numpy.where(true.astype(bool),
+                               numpy.uint64(2 ** 64 - 1), numpy.uint64(0))
+
+        # One period, then double it until it spans every model
+        run = 1 << i
+        column = ((1 << run) - 1) << run
+        width = 2 * run
+        while width < self.models:
+            column |= column << width
+            width *= 2
+        return column
+
+    def empty(self, column):
+        """Returns True if column is false in every model."""
+        if numpy is not None:
+            return not (column & self.full).any()
+        return not column & self.full
+
+
+def model_check(knowledge, query, engine="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    engine "enumerate" checks every model of the symbols, evaluating
+    the sentences compiled to Python functions. "truthtable" evaluates
+    them in every model at once with bitwise operations on their
+    truth table columns (up to TRUTH_TABLE_SYMBOLS symbols). "sat" asks
+    a SAT solver whether knowledge ∧ ¬query has a model, which scales
+    to far more symbols.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}")
+    if engine == "sat":
+        cnf = CNF()
+        cnf.add(knowledge)
+        cnf.add(Not(query))
+        return cnf.solve() is None
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    if engine == "truthtable":
+        # Entailed if no model makes knowledge true and query false
+        table = TruthTable(symbols)
+        return table.empty(table.column(knowledge)
+                           & (table.full ^ table.column(query)))
+
+    # Compile both sentences to functions of a model whose bit i is the
+    # value of symbols[i]
+    knowledge = knowledge.compile(symbols)
+    query = query.compile(symbols)
+
+    # Check that query is true in every model where knowledge is
+    for model in range(1 << len(symbols)):
+        if knowledge(model) and not query(model):
+            return False
+    return True
@@ -0,0 +1,277 @@
+"""
+CDCL (conflict-driven clause learning) SAT solver.
+
+Clauses are lists of integer literals, as in the DIMACS format: variable
+v (numbered from 1) is the literal v, and its negation is -v.
+"""
+
+
+def solve(clauses, count):
+    """
+    Returns a model satisfying every clause over variables 1 to count,
+    as a list indexed by variable of True/False (index 0 unused), or
+    None if the clauses are unsatisfiable.
+    """
+    return Solver(clauses, count).solve()
+
+
+def luby(i):
+    """Returns the i-th term (from 1) of the Luby sequence 1 1 2 1 1 2 4..."""
+    size = 1
+    while size < i + 1:
+        size = 2 * size + 1
+    while size - 1 != i - 1:
+        size = (size - 1) // 2
+        i = (i - 1) % size + 1
+        if size == i:
+            break
+    return (size + 1) // 2
+
+
+class Solver():
+    """
+    DPLL search with unit propagation over two watched literals per
+    clause, first-UIP clause learning with non-chronological
+    backjumping, activity-based branching with phase saving and Luby
+    restarts. Pure literals are assigned before the search starts.
+    """
+
+    # Conflicts in the shortest interval between restarts
+    RESTART_BASE = 64
+
+    # Activity decay per conflict, as a growth of the bump
+    DECAY = 1 / 0.95
+
+    def __init__(self, clauses, count):
+        self.count = count
+
+        # Per variable: 1 true, -1 false, 0 unassigned; the decision
+        # level of the assignment; the clause that forced it
+        self.values = [0] * (count + 1)
+        self.levels = [0] * (count + 1)
+        self.reasons = [None] * (count + 1)
+        self.phases = [-1] * (count + 1)
+        self.activity = [0.0] * (count + 1)
+        self.bump = 1.0
+
+        # Assigned literals in order, with where each decision level
+        # starts, and how far propagation has got through them
+        self.trail = []
+        self.limits = []
+        self.head = 0
+
+        # literal -> clauses watching it
+        self.watches = {}
+        self.clauses = []
+        self.learnt = []
+        self.unsatisfiable = False
+
+        for clause in clauses:
+            self.add_clause(clause)
+        if not self.unsatisfiable:
+            self.assign_pure_literals()
+
+    def value(self, literal):
+        """Returns 1 if literal is true, -1 if false, 0 if unassigned."""
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause):
+        """Adds a clause before the search starts."""
+        literals = list(dict.fromkeys(clause))
+        if any(-literal in literals for literal in literals):
+            # Always true
+            return
+        if not literals:
+            self.unsatisfiable = True
+        elif len(literals) == 1:
+            value = self.value(literals[0])
+            if value == -1:
+                self.unsatisfiable = True
+            elif value == 0:
+                self.assign(literals[0], None)
+        else:
+            self.clauses.append(literals)
+            self.watch(literals)
+
+    def watch(self, clause):
+        """Watches the first two literals of a clause."""
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def assign_pure_literals(self):
+        """
+        Assigns every variable occurring with only one sign that way,
+        which cannot make satisfiable clauses unsatisfiable.
+        """
+        signs = [0] * (self.count + 1)
+        for clause in self.clauses:
+            for literal in clause:
+                signs[abs(literal)] |= 1 if literal > 0 else 2
+        for variable in range(1, self.count + 1):
+            if self.values[variable] == 0 and signs[variable] in (1, 2):
+                self.assign(variable if signs[variable] == 1 else -variable,
+                            None)
+
+    def assign(self, literal, reason):
+        """Makes literal true at the current decision level."""
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = len(self.limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses.
+        Returns a clause made false, or None if there is no conflict.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watchers = self.watches.get(false, [])
+            kept = []
+            for position, clause in enumerate(watchers):
+                # Keep the false literal second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) == 1:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch
+                for i in range(2, len(clause)):
+                    if self.value(clause[i]) != -1:
+                        clause[1], clause[i] = clause[i], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(clause[0]) == -1:
+                        kept.extend(watchers[position + 1:])
+                        self.watches[false] = kept
+                        return clause
+                    self.assign(clause[0], clause)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Resolves the conflict clause back to its first unique
+        implication point. Returns the learnt clause, whose first
+        literal is the one to assert after backjumping.
+        """
+        level = len(self.limits)
+        learnt = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen:
+                    continue
+                if self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump_activity(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learnt.append(other)
+
+            # The latest assignment at this level taking part
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+
+        learnt[0] = -literal
+        return learnt
+
+    def bump_activity(self, variable):
+        self.activity[variable] += self.bump
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.bump *= 1e-100
+
+    def backjump(self, level):
+        """Undoes every assignment above decision level."""
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = 0
+            self.reasons[variable] = None
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = len(self.trail)
+
+    def learn(self, learnt):
+        """Backjumps as far as the learnt clause allows and asserts it."""
+        if len(learnt) == 1:
+            self.backjump(0)
+            self.assign(learnt[0], None)
+            return
+
+        # Watch the literal assigned deepest after the asserted one
+        deepest = max(range(1, len(learnt)),
+                      key=lambda i: self.levels[abs(learnt[i])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        self.backjump(self.levels[abs(learnt[1])])
+        self.learnt.append(learnt)
+        self.watch(learnt)
+        self.assign(learnt[0], learnt)
+
+    def decide(self):
+        """
+        Assigns the unassigned variable with the highest activity its
+        last value, opening a new decision level.
+        Returns False if every variable is assigned.
+        """
+        best = 0
+        best_activity = -1.0
+        for variable in range(1, self.count + 1):
+            if (self.values[variable] == 0
+                    and self.activity[variable] > best_activity):
+                best = variable
+                best_activity = self.activity[variable]
+        if not best:
+            return False
+        self.limits.append(len(self.trail))
+        self.assign(best if self.phases[best] == 1 else -best, None)
+        return True
+
+    def solve(self):
+        if self.unsatisfiable:
+            return None
+        conflicts = 0
+        restarts = 1
+        limit = self.RESTART_BASE * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    return None
+                self.learn(self.analyze(conflict))
+                self.bump *= self.DECAY
+                conflicts += 1
+                continue
+
+            if conflicts >= limit:
+                self.backjump(0)
+                conflicts = 0
+                restarts += 1
+                limit = self.RESTART_BASE * luby(restarts)
+                continue
+
+            if not self.decide():
+                return [False] + [value == 1 for value in self.values[1:]]
@@ -0,0 +1,118 @@
+import random
+import unittest
+
+import puzzle
+import sat
+from logic import (And, Biconditional, Implication, Not, Or, Symbol,
+                   ENGINES, CNF_METHODS, model_check)
+
+SYMBOLS = [Symbol(name) for name in "ABCDE"]
+
+
+def random_sentence(rng, depth):
+    """Returns a random sentence over SYMBOLS nested up to depth deep."""
+    if depth == 0 or rng.random() < 0.25:
+        symbol = rng.choice(SYMBOLS)
+        return Not(symbol) if rng.random() < 0.3 else symbol
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(rng, depth - 1))
+    if kind == 1:
+        return And(*[random_sentence(rng, depth - 1)
+                     for _ in range(rng.randint(1, 3))])
+    if kind == 2:
+        return Or(*[random_sentence(rng, depth - 1)
+                    for _ in range(rng.randint(1, 3))])
+    if kind == 3:
+        return Implication(random_sentence(rng, depth - 1),
+                           random_sentence(rng, depth - 1))
+    return Biconditional(random_sentence(rng, depth - 1),
+                         random_sentence(rng, depth - 1))
+
+
+def satisfies(values, clauses):
+    """Returns True if values (indexed by variable) satisfy every clause."""
+    return all(any(values[abs(literal)] == (literal > 0) for literal in clause)
+               for clause in clauses)
+
+
+class EngineTest(unittest.TestCase):
+    """Differential check of the entailment engines and CNF conversions."""
+
+    def test_engines_agree(self):
+        rng = random.Random(0)
+        for _ in range(1000):
+            knowledge = random_sentence(rng, 4)
+            query = random_sentence(rng, 3)
+            expected = model_check(knowledge, query, "enumerate")
+            for engine in ENGINES:
+                self.assertEqual(model_check(knowledge, query, engine),
+                                 expected, (engine, knowledge, query))
+
+    def test_cnf_models(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            sentence = random_sentence(rng, 4)
+            satisfiable = not model_check(sentence, And(SYMBOLS[0],
+                                                        Not(SYMBOLS[0])))
+            for method in CNF_METHODS:
+                model = sentence.to_cnf(method).solve()
+                self.assertEqual(model is not None, satisfiable,
+                                 (method, sentence))
+                if model is not None:
+                    model = {**{s.name: False for s in SYMBOLS}, **model}
+                    self.assertTrue(sentence.evaluate(model),
+                                    (method, sentence))
+
+    def test_puzzles(self):
+        knowledge_bases = [puzzle.knowledge0, puzzle.knowledge1,
+                           puzzle.knowledge2, puzzle.knowledge3]
+        symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+                   puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+        for knowledge in knowledge_bases:
+            for symbol in symbols:
+                expected = model_check(knowledge, symbol, "enumerate")
+                for engine in ENGINES:
+                    self.assertEqual(model_check(knowledge, symbol, engine),
+                                     expected, (engine, symbol))
+
+
+class SolverTest(unittest.TestCase):
+    """Checks the SAT solver against exhaustive search."""
+
+    def test_small(self):
+        rng = random.Random(2)
+        for _ in range(1500):
+            count = rng.randint(1, 10)
+            clauses = [[rng.choice((-1, 1)) * rng.randint(1, count)
+                        for _ in range(rng.randint(1, 3))]
+                       for _ in range(rng.randint(0, 5 * count))]
+            expected = any(
+                satisfies([None] + [bool(bits >> i & 1)
+                                    for i in range(count)], clauses)
+                for bits in range(1 << count)
+            )
+            values = sat.solve(clauses, count)
+            self.assertEqual(values is not None, expected, clauses)
+            if values is not None:
+                self.assertTrue(satisfies(values, clauses), clauses)
+
+    def test_threshold(self):
+        # Random 3-SAT near the satisfiability threshold, large enough
+        # to need learning and restarts
+        rng = random.Random(3)
+        for count in (50, 100, 150):
+            clauses = [[rng.choice((-1, 1)) * variable
+                        for variable in rng.sample(range(1, count + 1), 3)]
+                       for _ in range(int(4.26 * count))]
+            values = sat.solve(clauses, count)
+            if values is not None:
+                self.assertTrue(satisfies(values, clauses))
+
+    def test_luby(self):
+        self.assertEqual([sat.luby(i) for i in range(1, 16)],
+                         [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8])
+
+
+if __name__ == "__main__":
+    unittest.main()